@@ -1,13 +1,48 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-from .models import Episode, Quote, Source
+from .models import CatalogStats, Episode, HlsPackage, Quote, Source, SourceStats, SubtitleFile, VideoMetadata
+from .utils.derivatives import build_derivatives
+from .utils.quote_clips import generate_quote_clips, generate_video_clips
+from .utils.thumbnails import generate_quote_thumbnails, generate_video_thumbnails
+
+
+def report_thumbnails(modeladmin, request, count):
+    modeladmin.message_user(request, f"Generated {count} thumbnails.", messages.SUCCESS)
+
+
+@admin.action(description="Generate missing quote thumbnails")
+def generate_missing_quote_thumbnails(modeladmin, request, queryset):
+    # One batched ffmpeg pass per video instead of one process per quote
+    report_thumbnails(modeladmin, request, sum(generate_video_thumbnails(video) for video in queryset))
+
+
+@admin.action(description="Cut missing quote clips")
+def generate_missing_quote_clips(modeladmin, request, queryset):
+    count = sum(generate_video_clips(video) for video in queryset)
+    modeladmin.message_user(request, f"Cut {count} clips.", messages.SUCCESS)
 
 
 @admin.register(Source)
 class SourceAdmin(admin.ModelAdmin):
-    list_display = ("title", "source_type", "year", "created_at")
+    list_display = ("title", "source_type", "year", "episode_count", "quote_count", "runtime", "created_at")
     list_filter = ("source_type", "year")
+    list_select_related = ("stats",)
     search_fields = ("title", "description")
+    actions = [generate_missing_quote_thumbnails, generate_missing_quote_clips]
+
+    # Counts are read from SourceStats instead of annotating every row of the changelist
+    @admin.display(description="Episodes", ordering="stats__episode_count")
+    def episode_count(self, obj):
+        return getattr(getattr(obj, "stats", None), "episode_count", None)
+
+    @admin.display(description="Quotes", ordering="stats__quote_count")
+    def quote_count(self, obj):
+        return getattr(getattr(obj, "stats", None), "quote_count", None)
+
+    @admin.display(description="Runtime", ordering="stats__runtime")
+    def runtime(self, obj):
+        stats = getattr(obj, "stats", None)
+        return stats.runtime_display if stats else None
 
     # This makes the "Source Type" column look nice (e.g., Green for Movie, Blue for TV)
     def source_type_badge(self, obj):
@@ -15,6 +50,17 @@ class SourceAdmin(admin.ModelAdmin):
 
     source_type_badge.short_description = "Type"
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Responsive variants are built from the stored upload
+        if "thumbnail" in form.changed_data:
+            obj.thumbnail_digest, obj.thumbnail_width = (
+                build_derivatives(obj.thumbnail) if obj.thumbnail else ("", None)
+            )
+            Source.objects.filter(pk=obj.pk).update(
+                thumbnail_digest=obj.thumbnail_digest, thumbnail_width=obj.thumbnail_width
+            )
+
 
 @admin.register(Episode)
 class EpisodeAdmin(admin.ModelAdmin):
@@ -22,6 +68,7 @@ class EpisodeAdmin(admin.ModelAdmin):
     list_filter = ("source", "season")
     search_fields = ("title", "source__title")
     autocomplete_fields = ["source"]  # Helpful if you have many shows
+    actions = [generate_missing_quote_thumbnails, generate_missing_quote_clips]
 
 
 @admin.register(Quote)
@@ -29,9 +76,67 @@ class QuoteAdmin(admin.ModelAdmin):
     list_display = ("text_snippet", "source_title", "start_time", "duration")
     list_filter = ("source__source_type", "source")
     search_fields = ("text", "source__title")
+    actions = ["regenerate_thumbnails", "recut_clips"]
+
+    @admin.action(description="Regenerate thumbnails")
+    def regenerate_thumbnails(self, request, queryset):
+        report_thumbnails(self, request, generate_quote_thumbnails(queryset.select_related("source", "episode")))
+
+    @admin.action(description="Cut clips again")
+    def recut_clips(self, request, queryset):
+        count = generate_quote_clips(queryset.select_related("source", "episode"))
+        self.message_user(request, f"Cut {count} clips.", messages.SUCCESS)
 
     def text_snippet(self, obj):
         return obj.text[:50] + "..." if len(obj.text) > 50 else obj.text
 
     def source_title(self, obj):
         return obj.source.title
+
+
+@admin.register(SubtitleFile)
+class SubtitleFileAdmin(admin.ModelAdmin):
+    list_display = ("file_name", "source", "episode", "quote_count", "imported_at")
+    list_filter = ("source",)
+    search_fields = ("file_name", "source__title")
+    readonly_fields = ("content_hash", "quote_count", "imported_at")
+
+
+@admin.register(VideoMetadata)
+class VideoMetadataAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "duration", "width", "height", "video_codec", "audio_codec", "probed_at")
+    list_filter = ("video_codec", "audio_codec")
+    search_fields = ("path",)
+    readonly_fields = ("size", "mtime", "probed_at")
+
+
+@admin.register(HlsPackage)
+class HlsPackageAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "video_name", "segment_count", "created_at")
+    search_fields = ("video_name",)
+    readonly_fields = ("source", "episode", "video_name", "playlist", "renditions", "created_at")
+    exclude = ("segments",)
+
+    @admin.display(description="Segments")
+    def segment_count(self, obj):
+        return len(obj.segments)
+
+
+@admin.register(CatalogStats)
+class CatalogStatsAdmin(admin.ModelAdmin):
+    list_display = ("source_count", "episode_count", "quote_count", "runtime", "updated_at")
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(SourceStats)
+class SourceStatsAdmin(admin.ModelAdmin):
+    list_display = ("source", "episode_count", "quote_count", "runtime", "updated_at")
+    list_select_related = ("source",)
+    search_fields = ("source__title",)
+    # Maintained by the models; `manage reconcile_stats` fixes any drift
+    readonly_fields = ("source", "episode_count", "quote_count", "runtime", "updated_at")
+
+    def has_add_permission(self, request):
+        return False
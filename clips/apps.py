@@ -1,5 +1,30 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class ClipsConfig(AppConfig):
     name = "clips"
+
+    def ready(self):
+        from clips.models import Episode, HlsPackage, Quote, Source, SubtitleFile
+        from clips.signals import content_changed, quotes_changed
+        from clips.utils import conditional, quote_index, watch_payload
+        from clips.utils.search import restore_sqlite_triggers
+        from clips.utils.title_search import index_source, unindex_source
+
+        post_migrate.connect(restore_sqlite_triggers, sender=self)
+        post_save.connect(index_source, sender=Source)
+        post_delete.connect(unindex_source, sender=Source)
+        # Cached watch-page payloads; quote deletes arrive through content_changed (see clips.signals)
+        for model in (Source, Episode, Quote):
+            post_save.connect(watch_payload.instance_changed, sender=model)
+        for model in (Source, Episode):
+            post_delete.connect(watch_payload.instance_changed, sender=model)
+        content_changed.connect(watch_payload.content_changed)
+        # Content versions behind the catalog pages' ETags; imports save their SubtitleFile. No post_delete:
+        # it would turn off fast deletes of quotes. Deletes touch the versions themselves (Source.delete,
+        # Episode.delete and their querysets) or send content_changed (quotes)
+        for model in (Source, Episode, Quote, SubtitleFile, HlsPackage):
+            post_save.connect(conditional.instance_changed, sender=model)
+        content_changed.connect(conditional.content_changed)
+        quotes_changed.connect(quote_index.quotes_changed)
@@ -0,0 +1,148 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+
+from clips.models import Source, SourceType
+from clips.utils.subtitle_importer import import_quotes_from_srt
+from clips.utils.synthetic_subtitles import GAP_DISTRIBUTIONS, write_synthetic_subtitles
+
+TARGETS = ("importer", "process_subs")
+
+
+class QueryCounter:
+    """Database execute wrapper that counts queries without keeping them (unlike connection.queries)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (  # noqa: A003
+        "Benchmark subtitle imports on synthetic SRT/VTT files, in a throwaway copy of the configured database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--cues", type=int, nargs="+", default=[1000, 10000], help="Cue counts to generate (one file each)"
+        )
+        parser.add_argument("--format", choices=["srt", "vtt"], nargs="+", default=["srt"], dest="formats")
+        parser.add_argument("--gap", choices=sorted(GAP_DISTRIBUTIONS), nargs="+", default=["uniform"], dest="gaps")
+        parser.add_argument("--text-length", type=int, default=40, help="Average characters per cue")
+        parser.add_argument("--target", choices=TARGETS, nargs="+", default=list(TARGETS), dest="targets")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; the fastest one is kept")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="benchmark_results.json", help="JSON file the results are appended to")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1 or min(options["cues"]) < 1:
+            raise CommandError("--repeat and --cues must be positive numbers.")
+
+        vendor = connection.vendor
+        self.stdout.write(f"🚀 Benchmarking subtitle imports on {vendor}")
+
+        results = []
+        with tempfile.TemporaryDirectory(prefix="bench_") as tmp_dir:
+            old_config = self.setup_database(tmp_dir)
+            try:
+                for fmt in options["formats"]:
+                    for gap in options["gaps"]:
+                        for cues in options["cues"]:
+                            results += self.run_file(tmp_dir, fmt, gap, cues, options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+        self.save(options["output"], {"timestamp": timezone.now().isoformat(), "database": vendor, "results": results})
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(results)} results written to {options['output']}"))
+
+    def setup_database(self, tmp_dir):
+        """
+        Create and migrate a test database (the test runner's, named after the configured one) and point
+        the connection at it, so benchmark rows never land in, or lock, the live database. SQLite gets a
+        file in `tmp_dir` instead of the test runner's in-memory database, to time real disk writes.
+        """
+        if connection.vendor == "sqlite" and not connection.settings_dict["TEST"]["NAME"]:
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(tmp_dir, "benchmark.sqlite3")
+        return setup_databases(verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS}, serialized_aliases=set())
+
+    def run_file(self, tmp_dir, fmt, gap, cues, options):
+        path = os.path.join(tmp_dir, f"bench_{cues}_{gap}.{fmt}")
+        write_synthetic_subtitles(path, cues, fmt, gap, options["text_length"], options["seed"])
+        results = []
+        for target in options["targets"]:
+            result = self.run_case(target, path, cues, options["repeat"])
+            result.update({"format": fmt, "gap": gap, "cues": cues})
+            results.append(result)
+            self.report(result)
+        return results
+
+    def run_case(self, target, path, cues, repeat):
+        """
+        Time `repeat` imports of `path` into a fresh Source, then one more under tracemalloc for peak memory
+        (tracing slows Python down, so it is kept out of the timed runs).
+        """
+        timings = []
+        for _ in range(repeat):
+            elapsed, queries, quotes = self.run_once(target, path)
+            timings.append(elapsed)
+
+        tracemalloc.start()
+        try:
+            self.run_once(target, path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        best = min(timings)
+        return {
+            "target": target,
+            "seconds": round(best, 4),
+            "cues_per_sec": round(cues / best) if best > 0 else None,
+            "quotes": quotes,
+            "queries": queries,
+            "peak_memory_kb": round(peak / 1024),
+        }
+
+    def run_once(self, target, path):
+        source = Source.objects.create(title=f"Benchmark {os.path.basename(path)}", source_type=SourceType.MOVIE)
+        counter = QueryCounter()
+        try:
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                if target == "importer":
+                    import_quotes_from_srt(source.id, path)
+                else:
+                    call_command("process_subs", source.id, path, stdout=StringIO())
+                elapsed = time.perf_counter() - started
+            return elapsed, counter.count, source.quotes.count()
+        finally:
+            source.delete()
+
+    def report(self, result):
+        self.stdout.write(
+            f"⏱️ {result['target']:<12} {result['format']} {result['gap']:<7} {result['cues']:>7} cues: "
+            f"{result['seconds']:.3f}s, {result['cues_per_sec']} cues/sec, "
+            f"{result['queries']} queries, peak {result['peak_memory_kb']} KB"
+        )
+
+    def save(self, output, run):
+        """Append this run to the JSON history in `output` so runs can be compared over time."""
+        history = []
+        if os.path.exists(output):
+            with open(output, encoding="utf-8") as f:
+                history = json.load(f)
+        history.append(run)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(history, f, indent=2)
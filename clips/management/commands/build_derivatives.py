@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from clips.models import Quote, Source
+from clips.utils.derivatives import build_derivatives
+
+
+class Command(BaseCommand):
+    help = "Build responsive WebP/JPEG thumbnail variants for sources and quotes"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true", help="Rebuild variants for every thumbnail, not only new ones"
+        )
+
+    def handle(self, *args, **options):
+        for model in (Source, Quote):
+            items = model.objects.exclude(Q(thumbnail="") | Q(thumbnail__isnull=True)).only("id", "thumbnail")
+            if not options["all"]:
+                # Variants built before their widths were recorded are rebuilt too
+                items = items.filter(Q(thumbnail_digest="") | Q(thumbnail_width__isnull=True))
+
+            updated = []
+            for item in items.iterator():
+                try:
+                    item.thumbnail_digest, item.thumbnail_width = build_derivatives(item.thumbnail)
+                except (OSError, ValueError) as e:
+                    self.stdout.write(self.style.WARNING(f"⚠️ {model.__name__} {item.id}: {e}"))
+                    continue
+                updated.append(item)
+
+            model.objects.bulk_update(updated, ["thumbnail_digest", "thumbnail_width"], batch_size=500)
+            self.stdout.write(
+                self.style.SUCCESS(f"✅ {model.__name__}: built variants for {len(updated)} thumbnails.")
+            )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Recommend similar sources by comparing TF-IDF vectors of their quotes"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument("-k", type=int, default=5, help="Recommendations per source")
+
+    def handle(self, *args, **options):
+        try:
+            from clips.utils.recommendations import build_recommendations
+        except ImportError as e:
+            raise CommandError(f"Building recommendations needs NumPy and SciPy (pip install numpy scipy): {e}")
+
+        self.stdout.write("🚀 Building source recommendations")
+
+        started = time.perf_counter()
+        sources, recommendations, changed = build_recommendations(k=options["k"])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {recommendations} recommendations for {sources} sources ({changed} sources changed)."
+            )
+        )
+        self.stdout.write(f"⏱️ Building took {elapsed:.2f}s")
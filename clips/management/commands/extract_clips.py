@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from clips.models import Episode, Source
+from clips.utils.quote_clips import generate_video_clips
+
+
+class Command(BaseCommand):
+    help = "Cut a short stream-copied MP4 clip for every quote, one batched ffmpeg run per video"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", type=int, help="Only this source (and its episodes)")
+        parser.add_argument("--overwrite", action="store_true", help="Cut clips again for quotes that have one")
+
+    def handle(self, *args, **options):
+        sources = Source.objects.exclude(video_file="").exclude(video_file__isnull=True)
+        episodes = Episode.objects.exclude(video_file="").exclude(video_file__isnull=True).select_related("source")
+        if options["source"]:
+            sources = sources.filter(id=options["source"])
+            episodes = episodes.filter(source_id=options["source"])
+        videos = list(sources) + list(episodes)
+
+        self.stdout.write(f"🚀 Cutting quote clips for {len(videos)} videos")
+
+        started = time.perf_counter()
+        total = 0
+        for video in videos:
+            count = generate_video_clips(video, overwrite=options["overwrite"])
+            total += count
+            if count:
+                self.stdout.write(f"🎞️ {video}: {count} clips")
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Cut {total} clips."))
+        self.stdout.write(f"⏱️ Cutting took {elapsed:.2f}s")
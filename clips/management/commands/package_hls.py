@@ -0,0 +1,38 @@
+import subprocess
+import time
+
+from django.core.management.base import BaseCommand
+
+from clips.utils.hls import package_video, unpackaged_videos
+
+
+class Command(BaseCommand):
+    help = "Transcode videos into HLS renditions and record their segment manifests"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", type=int, help="Only this source (and its episodes)")
+        parser.add_argument("--overwrite", action="store_true", help="Package videos again even if up to date")
+
+    def handle(self, *args, **options):
+        videos = unpackaged_videos(options["source"], overwrite=options["overwrite"])
+
+        self.stdout.write(f"🚀 Packaging {len(videos)} videos for HLS")
+
+        started = time.perf_counter()
+        packaged = 0
+        for video in videos:
+            try:
+                package = package_video(video)
+            except subprocess.CalledProcessError as e:
+                self.stdout.write(self.style.ERROR(f"❌ {video}: {e.stderr.decode(errors='replace').strip()}"))
+                continue
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"❌ {video}: {e}"))
+                continue
+            packaged += 1
+            renditions = ", ".join(rendition["name"] for rendition in package.renditions)
+            self.stdout.write(f"📼 {video}: {len(package.segments)} segments ({renditions})")
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Packaged {packaged} of {len(videos)} videos."))
+        self.stdout.write(f"⏱️ Packaging took {elapsed:.2f}s")
@@ -0,0 +1,98 @@
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from clips.models import Episode, Source, SourceStats, VideoMetadata
+from clips.utils.video_probe import probe_metadata
+
+
+class Command(BaseCommand):
+    help = "Probe video metadata (duration, resolution, codecs, keyframes) for the whole library"  # noqa: A003
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Concurrent ffprobe processes (defaults to the number of CPUs)",
+        )
+        parser.add_argument("--force", action="store_true", help="Probe again even if the cached metadata is current")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers must be a positive number.")
+
+        # 1. Collect every video file, grouped by path (several rows may share a file)
+        videos = {}
+        for obj in list(Source.objects.exclude(video_file="")) + list(Episode.objects.exclude(video_file="")):
+            if obj.video_file and os.path.exists(obj.video_file.path):
+                videos.setdefault(obj.video_file.path, []).append(obj)
+
+        # 2. Skip files whose size and mtime match the cache (one query for all of them)
+        stats = {path: os.stat(path) for path in videos}
+        cached = {m.path: m for m in VideoMetadata.objects.filter(path__in=stats)}
+        pending = [
+            path
+            for path, stat in stats.items()
+            if options["force"]
+            or path not in cached
+            or (cached[path].size, cached[path].mtime) != (stat.st_size, stat.st_mtime)
+        ]
+        self.stdout.write(f"🚀 Probing {len(pending)} of {len(videos)} videos ({len(videos) - len(pending)} cached)")
+
+        # 3. ffprobe runs in threads; results are written from this thread only
+        failed = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = {pool.submit(probe_metadata, path): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    cached[path] = VideoMetadata.store(path, stats[path], future.result())
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"💥 {os.path.basename(path)}: {e}"))
+                    continue
+                self.stdout.write(f"🎞️ {os.path.basename(path)}: {self.describe(cached[path])}")
+
+        # 4. Copy durations onto Sources and Episodes in bulk
+        updated = self.copy_durations(videos, cached)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Probed {len(pending) - failed} videos, updated {updated} durations.")
+        )
+        if failed:
+            self.stdout.write(self.style.WARNING(f"⚠️ {failed} videos could not be probed."))
+        self.stdout.write(f"⏱️ Probing took {elapsed:.2f}s")
+
+    def copy_durations(self, videos, cached):
+        """Write changed durations with bulk_update, keeping the materialized runtimes in step."""
+        changed = {Source: [], Episode: []}
+        runtime = defaultdict(int)
+        for path, objs in videos.items():
+            duration = cached[path].duration_seconds if path in cached else None
+            for obj in objs:
+                if duration is not None and obj.duration != duration:
+                    source_id = obj.pk if isinstance(obj, Source) else obj.source_id
+                    runtime[source_id] += duration - (obj.duration or 0)
+                    obj.duration = duration
+                    changed[type(obj)].append(obj)
+        with transaction.atomic():
+            for model, objs in changed.items():
+                model.objects.bulk_update(objs, ["duration"], batch_size=500)
+            for source_id, seconds in runtime.items():
+                SourceStats.record(source_id, runtime=seconds)
+            SourceStats.touch(list(runtime))
+        return len(changed[Source]) + len(changed[Episode])
+
+    def describe(self, metadata):
+        keyframes = f", keyframe every {metadata.keyframe_interval:.1f}s" if metadata.keyframe_interval else ""
+        return (
+            f"{metadata.duration_seconds}s, {metadata.width}x{metadata.height}, "
+            f"{metadata.video_codec}/{metadata.audio_codec}{keyframes}"
+        )
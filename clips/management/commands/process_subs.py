@@ -1,9 +1,12 @@
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 
 from clips.models import Episode, Source, SourceType
-from clips.utils.subtitle_importer import import_quotes_from_srt
+from clips.utils import subtitle_importer, subtitle_parser
 
 
 class Command(BaseCommand):
@@ -12,19 +15,50 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         # Positional arguments (Required)
         parser.add_argument("source_id", type=int, help="ID of the Movie or TV Show")
-        parser.add_argument("srt_path", type=str, help="Path to the SRT file")
+        parser.add_argument(
+            "srt_path",
+            type=str,
+            help="Subtitle file (SRT, VTT, ASS), a directory of them or a glob pattern (quote it in the shell)",
+        )
 
-        # Optional Flag (Required ONLY for TV Shows)
+        # Optional Flag (single file only; season imports match episodes by SxxEyy in the filename)
         parser.add_argument("--episode", type=int, help="Episode ID (Mandatory if Source is a TV Show)")
 
+        # Import tuning
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=subtitle_importer.DEFAULT_BATCH_SIZE,
+            help="Quotes per bulk INSERT (bulk mode only)",
+        )
+        parser.add_argument("--no-bulk", action="store_true", help="Create quotes one by one instead of in bulk")
+        parser.add_argument(
+            "--thumbnails", action="store_true", help="Generate missing thumbnails after the import has committed"
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="Re-import files even if their contents did not change"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Parser processes for multi-file imports (defaults to the number of CPUs)",
+        )
+
     def handle(self, *args, **options):
         s_id = options["source_id"]
         srt_path = options["srt_path"]
         e_id = options["episode"]
 
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive number.")
+        if options["workers"] < 1:
+            raise CommandError("--workers must be a positive number.")
+
         # 1. Basic File Check
-        if not os.path.exists(srt_path):
-            raise CommandError(f"SRT file not found at: {srt_path}")
+        files = subtitle_importer.find_subtitle_files(srt_path)
+        if not files:
+            raise CommandError(f"Subtitle file not found at: {srt_path}")
 
         # 2. Source Validation
         try:
@@ -32,15 +66,19 @@ class Command(BaseCommand):
         except Source.DoesNotExist:
             raise CommandError(f"Source with ID {s_id} does not exist.")
 
+        # Directories, globs and TV show files without an explicit episode go through the season importer
+        is_single_file = os.path.isfile(srt_path)
+        if not is_single_file or (source.source_type == SourceType.TV_SHOW and not e_id):
+            if e_id:
+                self.stdout.write(self.style.WARNING("⚠️ Warning: Ignoring episode ID for a multi-file import."))
+            self.import_many(source, files, options)
+        else:
+            self.import_one(source, srt_path, e_id, options)
+
+    def import_one(self, source, srt_path, e_id, options):
         # 3. The "Universal" Logic Bridge
-        # If it's a TV Show, we MUST have an episode ID
+        # If it's a TV Show, verify the episode belongs to this show
         if source.source_type == SourceType.TV_SHOW:
-            if not e_id:
-                raise CommandError(
-                    f"🛑 '{source.title}' is a TV Show. You must provide an episode ID.\n"
-                    f"Usage: python manage.py process_subs {s_id} {srt_path} --episode <ID>"
-                )
-            # Verify the episode belongs to this show
             if not Episode.objects.filter(id=e_id, source=source).exists():
                 raise CommandError(f"🛑 Episode {e_id} does not belong to show '{source.title}'.")
 
@@ -52,8 +90,142 @@ class Command(BaseCommand):
         # 4. Execution
         self.stdout.write(f"🚀 Processing: {source.title}" + (f" (EP ID: {e_id})" if e_id else ""))
 
+        started = time.perf_counter()
         try:
-            count = import_quotes_from_srt(source_id=s_id, srt_file_path=srt_path, episode_id=e_id)
-            self.stdout.write(self.style.SUCCESS(f"✅ Success! Created {count} quotes."))
+            result = subtitle_importer.import_quotes_from_srt(
+                source_id=source.id,
+                srt_file_path=srt_path,
+                episode_id=e_id,
+                bulk=not options["no_bulk"],
+                batch_size=options["batch_size"],
+                force=options["force"],
+            )
         except Exception as e:
             raise CommandError(f"💥 Failed to import: {str(e)}")
+        elapsed = time.perf_counter() - started
+
+        if result.skipped:
+            self.stdout.write(self.style.SUCCESS(f"✅ Unchanged since last import ({result.unchanged} quotes)."))
+            return
+
+        rows = result.created + result.updated + result.deleted
+        rate = rows / elapsed if elapsed > 0 else 0
+        self.stdout.write(self.style.SUCCESS(f"✅ Success! {self.describe(result)}."))
+        self.stdout.write(f"⏱️ Import took {elapsed:.2f}s ({rate:.0f} rows/sec)")
+
+        # 5. Deferred thumbnails (outside of the import transaction)
+        if options["thumbnails"]:
+            self.generate_thumbnails(source.id, e_id)
+
+    def import_many(self, source, files, options):
+        """
+        Parse and segment files in a process pool, then write every file from this (single) process.
+        Files that cannot be matched or fail to import are skipped and reported.
+        """
+        self.stdout.write(f"🚀 Processing {len(files)} files for: {source.title}")
+
+        # 1. Match files to episodes (TV shows only)
+        jobs, skipped = self.match_episodes(source, files)
+        for path, reason in skipped:
+            self.stdout.write(self.style.WARNING(f"⏭️ Skipped {os.path.basename(path)}: {reason}"))
+
+        # Hashing is much cheaper than parsing, so unchanged files never reach the pool
+        hashed_jobs = []
+        unchanged = 0
+        for path, episode in jobs:
+            content_hash = subtitle_importer.file_hash(path)
+            if not options["force"] and subtitle_importer.find_unchanged_file(source, episode, path, content_hash):
+                unchanged += 1
+                self.stdout.write(f"💤 {os.path.basename(path)}: unchanged")
+            else:
+                hashed_jobs.append((path, episode, content_hash))
+
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+
+        # 2. Parse in parallel, write from the coordinator as results arrive
+        rows_total = 0
+        failed = []
+        started = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=min(options["workers"], len(hashed_jobs) or 1)) as pool:
+            futures = {
+                pool.submit(subtitle_parser.parse_subtitle_file, path): (path, episode, content_hash)
+                for path, episode, content_hash in hashed_jobs
+            }
+            for future in as_completed(futures):
+                path, episode, content_hash = futures[future]
+                name = os.path.basename(path)
+                label = f"S{episode.season}E{episode.episode_number}" if episode else source.title
+                try:
+                    file_started = time.perf_counter()
+                    segments = future.result()
+                    result = subtitle_importer.sync_quotes(
+                        source,
+                        episode,
+                        path,
+                        content_hash,
+                        segments,
+                        bulk=not options["no_bulk"],
+                        batch_size=options["batch_size"],
+                    )
+                except Exception as e:
+                    failed.append(path)
+                    self.stdout.write(self.style.ERROR(f"💥 {name} ({label}): {e}"))
+                    continue
+
+                rows_total += result.created + result.updated + result.deleted
+                self.stdout.write(
+                    f"✅ {name} ({label}): {self.describe(result)}, "
+                    f"written in {time.perf_counter() - file_started:.2f}s"
+                )
+
+        elapsed = time.perf_counter() - started
+        rate = rows_total / elapsed if elapsed > 0 else 0
+
+        # 3. Summary
+        imported = len(hashed_jobs) - len(failed)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Imported {imported}/{len(files)} files ({unchanged} unchanged), wrote {rows_total} quotes."
+            )
+        )
+        if skipped or failed:
+            self.stdout.write(self.style.WARNING(f"⚠️ Skipped {len(skipped)} files, {len(failed)} failed."))
+        self.stdout.write(f"⏱️ Import took {elapsed:.2f}s ({rate:.0f} rows/sec)")
+
+        if options["thumbnails"]:
+            self.generate_thumbnails(source.id)
+
+    def match_episodes(self, source, files):
+        """
+        Pair every file with its Episode (None for movies).
+        Returns (jobs, skipped) where skipped holds (path, reason) for files that could not be matched.
+        """
+        if source.source_type != SourceType.TV_SHOW:
+            return [(path, None) for path in files], []
+
+        jobs = []
+        skipped = []
+        episodes = {(ep.season, ep.episode_number): ep for ep in source.episodes.all()}
+        for path in files:
+            key = subtitle_importer.parse_episode_key(path)
+            if key is None:
+                skipped.append((path, "no SxxEyy in filename"))
+            elif key not in episodes:
+                skipped.append((path, f"no episode S{key[0]}E{key[1]} for '{source.title}'"))
+            else:
+                jobs.append((path, episodes[key]))
+        return jobs, skipped
+
+    def describe(self, result):
+        return (
+            f"{result.created} created, {result.updated} updated, "
+            f"{result.deleted} deleted, {result.unchanged} unchanged"
+        )
+
+    def generate_thumbnails(self, source_id, episode_id=None):
+        started = time.perf_counter()
+        thumbs = subtitle_importer.generate_missing_thumbnails(source_id=source_id, episode_id=episode_id)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"🖼️ Generated {thumbs} thumbnails in {elapsed:.2f}s")
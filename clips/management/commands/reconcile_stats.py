@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from clips.models import CatalogStats
+from clips.utils.catalog_stats import STAT_FIELDS, reconcile_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the catalog statistics (per-source and total counts) from the database"  # noqa: A003
+
+    def handle(self, *args, **options):
+        self.stdout.write("🚀 Recomputing catalog statistics")
+
+        started = time.perf_counter()
+        drift = reconcile_stats()
+        elapsed = time.perf_counter() - started
+
+        for source_id, (stored, actual) in sorted(drift.items()):
+            if stored is None:
+                self.stdout.write(f"➕ Source {source_id}: created {dict(zip(STAT_FIELDS, actual))}")
+                continue
+            changes = ", ".join(
+                f"{field} {old} → {new}" for field, old, new in zip(STAT_FIELDS, stored, actual) if old != new
+            )
+            self.stdout.write(self.style.WARNING(f"⚠️ Source {source_id}: {changes}"))
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {CatalogStats.current()} ({len(drift)} sources corrected)."))
+        self.stdout.write(f"⏱️ Reconciling took {elapsed:.2f}s")
@@ -0,0 +1,54 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubtitleFile",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("file_name", models.CharField(max_length=255)),
+                ("content_hash", models.CharField(help_text="SHA-256 of the file contents", max_length=64)),
+                ("quote_count", models.PositiveIntegerField(default=0)),
+                ("imported_at", models.DateTimeField(auto_now=True)),
+                (
+                    "episode",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="subtitle_files",
+                        to="clips.episode",
+                    ),
+                ),
+                (
+                    "source",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="subtitle_files", to="clips.source"
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("source", "episode", "file_name")},
+            },
+        ),
+        migrations.AddField(
+            model_name="quote",
+            name="subtitle_file",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="quotes",
+                to="clips.subtitlefile",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0003_subtitlefile_quote_subtitle_file"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quote",
+            name="thumbnail_digest",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="source",
+            name="thumbnail_digest",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0004_quote_thumbnail_digest_source_thumbnail_digest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VideoMetadata",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("path", models.CharField(max_length=1024, unique=True)),
+                ("size", models.PositiveBigIntegerField()),
+                ("mtime", models.FloatField()),
+                ("duration", models.FloatField(blank=True, help_text="Duration in seconds", null=True)),
+                ("width", models.PositiveIntegerField(blank=True, null=True)),
+                ("height", models.PositiveIntegerField(blank=True, null=True)),
+                ("video_codec", models.CharField(blank=True, max_length=32)),
+                ("audio_codec", models.CharField(blank=True, max_length=32)),
+                ("bitrate", models.PositiveBigIntegerField(blank=True, help_text="Bits per second", null=True)),
+                (
+                    "keyframe_interval",
+                    models.FloatField(blank=True, help_text="Average seconds between keyframes", null=True),
+                ),
+                ("probed_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "video metadata",
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:50
+
+from django.db import migrations
+
+# Full-text index as of this migration: a generated tsvector column with a GIN index on Postgres,
+# an FTS5 table kept in sync by triggers on SQLite (clips.utils.search restores the triggers after
+# later migrations rebuild clips_quote). Other databases fall back to unranked substring search.
+FTS_TABLE = "clips_quote_fts"
+
+SQLITE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+    USING fts5(text, content='clips_quote', content_rowid='id', tokenize='unicode61 remove_diacritics 2')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON clips_quote BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON clips_quote BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF text ON clips_quote BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+POSTGRES_SQL = [
+    """
+    ALTER TABLE clips_quote ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(text, ''))) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS clips_quote_search_vector_gin ON clips_quote USING GIN (search_vector)",
+]
+
+
+def create_search_index(apps, schema_editor):
+    conn = schema_editor.connection
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            statements = POSTGRES_SQL
+        elif conn.vendor == "sqlite":
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            statements = SQLITE_SQL if cursor.fetchone()[0] else []
+        else:
+            statements = []
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def remove_search_index(apps, schema_editor):
+    conn = schema_editor.connection
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            cursor.execute("ALTER TABLE clips_quote DROP COLUMN IF EXISTS search_vector")
+        elif conn.vendor == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0005_videometadata"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, remove_search_index),
+    ]
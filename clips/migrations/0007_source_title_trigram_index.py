@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:10
+
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations
+
+# Serves %, <% and ILIKE on titles. Postgres only: other databases search titles with the
+# in-memory index in clips.utils.title_search, so the index is not part of the model state.
+TITLE_INDEX = GinIndex(fields=["title"], name="clips_source_title_trgm", opclasses=["gin_trgm_ops"])
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.add_index(apps.get_model("clips", "Source"), TITLE_INDEX)
+
+
+def remove_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.remove_index(apps.get_model("clips", "Source"), TITLE_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0006_quote_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, remove_trigram_index),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_catalog_stats(apps, schema_editor):
+    """Stats of the existing rows, from one GROUP BY per table; the models keep them up to date from here on."""
+    Source = apps.get_model("clips", "Source")
+    Episode = apps.get_model("clips", "Episode")
+    Quote = apps.get_model("clips", "Quote")
+    SourceStats = apps.get_model("clips", "SourceStats")
+    CatalogStats = apps.get_model("clips", "CatalogStats")
+
+    stats = {
+        source_id: SourceStats(source_id=source_id, runtime=duration or 0)
+        for source_id, duration in Source.objects.values_list("id", "duration")
+    }
+    for source_id, count, runtime in (
+        Episode.objects.order_by().values_list("source_id").annotate(Count("id"), Sum("duration"))
+    ):
+        stats[source_id].episode_count = count
+        stats[source_id].runtime += runtime or 0
+    for source_id, count in Quote.objects.order_by().values_list("source_id").annotate(Count("id")):
+        stats[source_id].quote_count = count
+
+    SourceStats.objects.bulk_create(stats.values(), batch_size=500)
+    CatalogStats.objects.create(
+        pk=1,
+        source_count=len(stats),
+        episode_count=sum(row.episode_count for row in stats.values()),
+        quote_count=sum(row.quote_count for row in stats.values()),
+        runtime=sum(row.runtime for row in stats.values()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0007_source_title_trigram_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("source_count", models.PositiveIntegerField(default=0)),
+                ("episode_count", models.PositiveIntegerField(default=0)),
+                ("quote_count", models.PositiveIntegerField(default=0)),
+                ("runtime", models.PositiveBigIntegerField(default=0, help_text="Seconds of video")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "catalog stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="SourceStats",
+            fields=[
+                (
+                    "source",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="clips.source",
+                    ),
+                ),
+                ("episode_count", models.PositiveIntegerField(default=0)),
+                ("quote_count", models.PositiveIntegerField(default=0)),
+                ("runtime", models.PositiveBigIntegerField(default=0, help_text="Seconds of video")),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "source stats",
+            },
+        ),
+        migrations.RunPython(fill_catalog_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0008_catalog_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quote",
+            name="clip",
+            field=models.FileField(blank=True, null=True, upload_to="quote_clips/"),
+        ),
+        migrations.AddField(
+            model_name="quote",
+            name="clip_start",
+            field=models.FloatField(blank=True, help_text="Where the clip starts in the full video", null=True),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0009_quote_clip"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HlsPackage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("video_name", models.CharField(help_text="The video_file the package was made from", max_length=255)),
+                ("playlist", models.CharField(help_text="Master playlist, relative to MEDIA_ROOT", max_length=255)),
+                ("renditions", models.JSONField(default=list)),
+                ("segments", models.JSONField(default=list, help_text="Start time of every segment, in seconds")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "episode",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hls_package",
+                        to="clips.episode",
+                    ),
+                ),
+                (
+                    "source",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hls_package",
+                        to="clips.source",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            models.Q(("episode__isnull", True), ("source__isnull", False)),
+                            models.Q(("episode__isnull", False), ("source__isnull", True)),
+                            _connector="OR",
+                        ),
+                        name="hls_package_one_video",
+                    )
+                ],
+            },
+        ),
+    ]
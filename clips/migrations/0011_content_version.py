@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0010_hls_package"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="catalogstats",
+            name="version",
+            field=models.PositiveBigIntegerField(
+                default=0, help_text="Bumped on every change to the catalog's content"
+            ),
+        ),
+        migrations.AddField(
+            model_name="sourcestats",
+            name="version",
+            field=models.PositiveBigIntegerField(
+                default=0, help_text="Bumped on every change to the source's content"
+            ),
+        ),
+    ]
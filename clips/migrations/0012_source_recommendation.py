@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0011_content_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SourceRecommendation",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("rank", models.PositiveSmallIntegerField()),
+                ("score", models.FloatField(help_text="Cosine similarity of the sources' TF-IDF vectors")),
+                (
+                    "recommended",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="+", to="clips.source"
+                    ),
+                ),
+                (
+                    "source",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="recommendations", to="clips.source"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["source", "rank"],
+                "constraints": [models.UniqueConstraint(fields=("source", "rank"), name="unique_recommendation_rank")],
+            },
+        ),
+    ]
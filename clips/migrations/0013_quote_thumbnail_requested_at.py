@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0012_source_recommendation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quote",
+            name="thumbnail_requested_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
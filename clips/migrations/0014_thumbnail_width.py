@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clips", "0013_quote_thumbnail_requested_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quote",
+            name="thumbnail_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="source",
+            name="thumbnail_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,11 +1,20 @@
-import subprocess
+import os
+from bisect import bisect_right
+from collections import defaultdict
 
 from django.conf import settings
-from django.core.files import File
+from django.core.files.storage import default_storage
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+from django.urls import reverse
+from django.utils import timezone
 
-from clips.utils.video_duration import get_video_duration
+from clips.signals import content_changed, quotes_changed
+from clips.utils.derivatives import derivative_srcset
+from clips.utils.quote_index import index_enabled
+from clips.utils.video_probe import probe_metadata
 
 
 class SourceType(models.TextChoices):
@@ -13,7 +22,128 @@ class SourceType(models.TextChoices):
     TV_SHOW = "tv_show", "TV Show"
 
 
-class Source(models.Model):
+class VideoMetadata(models.Model):
+    """
+    ffprobe results cached per file. A row is valid while the file's size and mtime match,
+    so re-saves and library re-scans never probe the same file twice.
+    """
+
+    path = models.CharField(max_length=1024, unique=True)
+    size = models.PositiveBigIntegerField()
+    mtime = models.FloatField()
+    duration = models.FloatField(null=True, blank=True, help_text="Duration in seconds")
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    video_codec = models.CharField(max_length=32, blank=True)
+    audio_codec = models.CharField(max_length=32, blank=True)
+    bitrate = models.PositiveBigIntegerField(null=True, blank=True, help_text="Bits per second")
+    keyframe_interval = models.FloatField(null=True, blank=True, help_text="Average seconds between keyframes")
+    probed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "video metadata"
+
+    def __str__(self):
+        return os.path.basename(self.path)
+
+    @classmethod
+    def cached(cls, path, stat=None):
+        """Cached metadata for `path`, or None if it was never probed or the file changed since."""
+        stat = stat or os.stat(path)
+        return cls.objects.filter(path=path, size=stat.st_size, mtime=stat.st_mtime).first()
+
+    @classmethod
+    def store(cls, path, stat, metadata):
+        metadata, _ = cls.objects.update_or_create(
+            path=path, defaults={"size": stat.st_size, "mtime": stat.st_mtime, **metadata}
+        )
+        return metadata
+
+    @classmethod
+    def for_file(cls, path):
+        """Metadata for `path`, running ffprobe only on a cache miss."""
+        stat = os.stat(path)
+        return cls.cached(path, stat) or cls.store(path, stat, probe_metadata(path))
+
+    @property
+    def duration_seconds(self):
+        return round(self.duration) if self.duration is not None else None
+
+
+class StreamableVideo:
+    """
+    HLS playback for models with a `video_file`, a `duration` and an `hls_package` (see HlsPackage).
+    The stored video file and duration are remembered on load, so save() can tell what changed without querying.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        if "video_file" in loaded:
+            instance._loaded_video_file = loaded["video_file"] or ""
+        if "duration" in loaded:
+            instance._loaded_duration = loaded["duration"]
+        return instance
+
+    def mark_loaded(self):
+        self._loaded_video_file = self.video_file.name or ""
+        self._loaded_duration = self.duration
+
+    @property
+    def video_file_changed(self):
+        if "video_file" in self.get_deferred_fields():
+            return False
+        # New instances (and ones loaded without the field) have nothing to compare against
+        loaded = getattr(self, "_loaded_video_file", None)
+        return loaded is None or loaded != (self.video_file.name or "")
+
+    def runtime_change(self, update_fields=None):
+        """
+        Seconds a save adds to the runtime stats: a new row's whole duration, else the change since it was
+        loaded (none when the stored duration is unknown or the save leaves it out).
+        """
+        if self._state.adding:
+            return self.duration or 0
+        if update_fields is not None and "duration" not in update_fields:
+            return 0
+        if "duration" in self.get_deferred_fields() or not hasattr(self, "_loaded_duration"):
+            return 0
+        return (self.duration or 0) - (self._loaded_duration or 0)
+
+    @property
+    def hls(self):
+        """The HLS package made from the current video file, if there is one."""
+        package = getattr(self, "hls_package", None)
+        if package is None or not self.video_file or package.video_name != self.video_file.name:
+            return None
+        return package
+
+    @property
+    def stream_url(self):
+        """Master playlist when the video has been packaged, the progressive MP4 otherwise."""
+        package = self.hls
+        return package.playlist_url if package else self.video_url
+
+
+def indexed_quote_ids(quotes):
+    """Ids of `quotes` for quotes_changed, taken before a delete or update; no query while the search index is off."""
+    return list(quotes.values_list("id", flat=True)) if index_enabled() else []
+
+
+class SourceQuerySet(models.QuerySet):
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            source_ids = list(self.values_list("id", flat=True))
+            quote_ids = indexed_quote_ids(Quote.objects.filter(source_id__in=source_ids))
+            SourceStats.forget(source_ids)
+            result = super().delete()
+            SourceStats.touch(source_ids)
+            quotes_changed.send(sender=Quote, quote_ids=quote_ids)
+            return result
+
+
+class Source(StreamableVideo, models.Model):
     """
     Represents the 'Container' or the 'Movie'.
     For a Movie: Holds the video file directly.
@@ -26,15 +156,139 @@ class Source(models.Model):
     year = models.PositiveIntegerField(null=True, blank=True)
     description = models.TextField(blank=True)
     thumbnail = models.ImageField(upload_to="thumbnails/", blank=True, null=True)
+    thumbnail_digest = models.CharField(max_length=64, blank=True, editable=False)
+    # Caps the widths of its variants (see `clips.utils.derivatives.variant_widths`)
+    thumbnail_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
     video_file = models.FileField(upload_to="videos/", blank=True, null=True)
     duration = models.PositiveIntegerField(null=True, blank=True, help_text="Duration in seconds")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = SourceQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.title} ({self.get_source_type_display()})"
 
+    @property
+    def thumbnail_srcset(self):
+        return derivative_srcset(self.thumbnail_digest, self.thumbnail_width)
+
+    @property
+    def video_url(self):
+        """The range-capable streaming view for the video (see `clips.utils.streaming`)."""
+        return reverse("clips:stream_video", args=["source", self.pk]) if self.video_file else ""
 
-class Episode(models.Model):
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        is_new_video = self.video_file_changed
+        runtime = self.runtime_change(kwargs.get("update_fields"))
+        super().save(*args, **kwargs)
+        self.mark_loaded()
+        SourceStats.record(self.pk, sources=int(is_new), runtime=runtime)
+
+        # Movies hold their own video; a new or replaced file is probed (cached) once the row is committed
+        if is_new_video and self.video_file:
+            transaction.on_commit(self.update_video_duration)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            source_id = self.pk
+            quote_ids = indexed_quote_ids(self.quotes.all())
+            SourceStats.forget([source_id])
+            result = super().delete(*args, **kwargs)
+            SourceStats.touch([source_id])
+            quotes_changed.send(sender=Quote, quote_ids=quote_ids)
+            return result
+
+    def update_video_duration(self):
+        try:
+            previous = self.duration or 0
+            self.duration = VideoMetadata.for_file(self.video_file.path).duration_seconds
+            Source.objects.filter(pk=self.pk).update(duration=self.duration)
+            self._loaded_duration = self.duration
+            SourceStats.record(self.pk, runtime=(self.duration or 0) - previous)
+        except Exception as e:
+            print(f"Error getting duration: {e}")
+
+
+class EpisodeQuerySet(models.QuerySet):
+    def bulk_register(self, episodes, batch_size=500):
+        """
+        Create or update unsaved Episode instances, matched on (source, season, episode_number),
+        with one SELECT, bulk_create for new rows and bulk_update for existing ones.
+        Durations of new or changed video files are probed once the transaction commits.
+        Returns (created, updated) lists of saved instances.
+        """
+        episodes = list(episodes)
+        fields = ["title", "video_file"]
+
+        with transaction.atomic(using=self.db):
+            existing = {}
+            for ep in self.filter(source__in={ep.source_id for ep in episodes}):
+                existing[(ep.source_id, ep.season, ep.episode_number)] = ep
+
+            created = []
+            updated = []
+            for ep in episodes:
+                current = existing.get((ep.source_id, ep.season, ep.episode_number))
+                if current is None:
+                    created.append(ep)
+                    continue
+                for field in fields:
+                    setattr(current, field, getattr(ep, field))
+                updated.append(current)
+
+            changed_videos = [ep for ep in created + updated if ep.video_file and ep.video_file_changed]
+            self.bulk_create(created, batch_size=batch_size)
+            self.bulk_update(updated, fields, batch_size=batch_size)
+            for ep in created + updated:
+                ep.mark_loaded()
+
+            transaction.on_commit(lambda: self.update_video_durations(changed_videos), using=self.db)
+            content_changed.send(sender=Episode, source_ids=list({ep.source_id for ep in updated}))
+
+        return created, updated
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        counts = tally(objs, lambda ep: ep.duration)
+        for source_id, (count, runtime) in counts.items():
+            SourceStats.record(source_id, episodes=count, runtime=runtime)
+        content_changed.send(sender=Episode, source_ids=list(counts))
+        return objs
+
+    def update_video_durations(self, episodes, batch_size=500):
+        """Probe (cached) durations for `episodes` and write them with a single bulk_update."""
+        probed = []
+        runtime = defaultdict(int)
+        for ep in episodes:
+            try:
+                duration = VideoMetadata.for_file(ep.video_file.path).duration_seconds
+            except Exception as e:
+                print(f"Error getting duration: {e}")
+                continue
+            if duration != ep.duration:
+                runtime[ep.source_id] += (duration or 0) - (ep.duration or 0)
+                ep.duration = ep._loaded_duration = duration
+                probed.append(ep)
+        with transaction.atomic(using=self.db):
+            self.bulk_update(probed, ["duration"], batch_size=batch_size)
+            for source_id, seconds in runtime.items():
+                SourceStats.record(source_id, runtime=seconds)
+            SourceStats.touch(list(runtime))
+        return len(probed)
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            source_ids = list(self.order_by().values_list("source_id", flat=True).distinct())
+            quote_ids = indexed_quote_ids(Quote.objects.filter(episode__in=self.order_by().values("id")))
+            SourceStats.forget_episodes(self)
+            result = super().delete()
+            SourceStats.touch(source_ids)
+            quotes_changed.send(sender=Quote, quote_ids=quote_ids)
+            return result
+
+
+class Episode(StreamableVideo, models.Model):
     """
     Only used for TV Shows. Links back to the parent Source.
     """
@@ -46,6 +300,8 @@ class Episode(models.Model):
     video_file = models.FileField(upload_to="episodes/", blank=True, null=True)
     duration = models.PositiveIntegerField(null=True, blank=True)
 
+    objects = EpisodeQuerySet.as_manager()
+
     class Meta:
         ordering = ["season", "episode_number"]
         unique_together = [["source", "season", "episode_number"]]
@@ -53,44 +309,170 @@ class Episode(models.Model):
     def __str__(self):
         return f"{self.source.title} S{self.season}E{self.episode_number}"
 
+    @property
+    def video_url(self):
+        return reverse("clips:stream_video", args=["episode", self.pk]) if self.video_file else ""
+
     def save(self, *args, **kwargs):
-        is_new_video = False
-        if self.pk:
-            old_file = Episode.objects.get(pk=self.pk).video_file
-            if old_file != self.video_file:
-                is_new_video = True
-        else:
-            is_new_video = True
+        is_new = self._state.adding
+        is_new_video = self.video_file_changed
+        runtime = self.runtime_change(kwargs.get("update_fields"))
         super().save(*args, **kwargs)
+        self.mark_loaded()
+        SourceStats.record(self.source_id, episodes=int(is_new), runtime=runtime)
 
         if is_new_video and self.video_file:
-            self.update_video_duration()
+            transaction.on_commit(self.update_video_duration)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            quote_ids = indexed_quote_ids(self.quotes.all())
+            SourceStats.forget_episodes(Episode.objects.filter(pk=self.pk))
+            result = super().delete(*args, **kwargs)
+            SourceStats.touch([self.source_id])
+            quotes_changed.send(sender=Quote, quote_ids=quote_ids)
+            return result
 
     def update_video_duration(self):
-        try:
-            duration = get_video_duration(self.video_file.path)
-            Episode.objects.filter(pk=self.pk).update(duration=duration)
-        except Exception as e:
-            print(f"Error getting duration: {e}")
+        Episode.objects.update_video_durations([self])
+
+
+class HlsPackage(models.Model):
+    """
+    HLS renditions of a movie's (Source) or an episode's video, made by `clips.utils.hls`.
+    Every rendition is cut at the same times, so `segments` is the manifest of all of them.
+    """
+
+    source = models.OneToOneField(Source, on_delete=models.CASCADE, related_name="hls_package", null=True, blank=True)
+    episode = models.OneToOneField(
+        Episode, on_delete=models.CASCADE, related_name="hls_package", null=True, blank=True
+    )
+    video_name = models.CharField(max_length=255, help_text="The video_file the package was made from")
+    playlist = models.CharField(max_length=255, help_text="Master playlist, relative to MEDIA_ROOT")
+    renditions = models.JSONField(default=list)
+    segments = models.JSONField(default=list, help_text="Start time of every segment, in seconds")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(source__isnull=False, episode__isnull=True)
+                | Q(source__isnull=True, episode__isnull=False),
+                name="hls_package_one_video",
+            )
+        ]
+
+    def __str__(self):
+        return f"HLS: {self.episode or self.source}"
+
+    @property
+    def playlist_url(self):
+        return default_storage.url(self.playlist)
+
+    def segment_at(self, seconds):
+        """Number of the segment playing at `seconds` (the same in every rendition)."""
+        return max(bisect_right(self.segments, seconds) - 1, 0)
+
+    def segment_start(self, seconds):
+        return self.segments[self.segment_at(seconds)] if self.segments else 0.0
 
 
-def generate_thumbnail(video_path, timestamp, output_path):
-    """Generate thumbnail from video at specific timestamp"""
-    command = ["ffmpeg", "-ss", str(timestamp), "-i", video_path, "-vframes", "1", "-q:v", "2", "-y", output_path]
-    subprocess.run(command, check=True)
-    return output_path
+class SourceRecommendation(models.Model):
+    """A source's k most similar sources by quote text, written by `manage build_recommendations`."""
+
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name="recommendations")
+    recommended = models.ForeignKey(Source, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField(help_text="Cosine similarity of the sources' TF-IDF vectors")
+
+    class Meta:
+        ordering = ["source", "rank"]
+        constraints = [models.UniqueConstraint(fields=["source", "rank"], name="unique_recommendation_rank")]
+
+    def __str__(self):
+        return f"{self.source_id} → {self.recommended_id} ({self.score:.3f})"
+
+
+class SubtitleFile(models.Model):
+    """
+    A subtitle file imported for a Movie or an Episode.
+    The content hash lets unchanged files be skipped on re-import.
+    """
+
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name="subtitle_files")
+    episode = models.ForeignKey(
+        Episode, on_delete=models.CASCADE, related_name="subtitle_files", null=True, blank=True
+    )
+    file_name = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64, help_text="SHA-256 of the file contents")
+    quote_count = models.PositiveIntegerField(default=0)
+    imported_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [["source", "episode", "file_name"]]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.source.title})"
+
+
+# Quote fields the search index holds
+INDEXED_QUOTE_FIELDS = {"text", "source", "source_id", "episode", "episode_id"}
+
+
+class QuoteQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        counts = tally(objs)
+        for source_id, (count, _) in counts.items():
+            SourceStats.record(source_id, quotes=count)
+        content_changed.send(sender=Quote, source_ids=list(counts))
+        return objs
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            counts = list(self.order_by().values_list("source_id").annotate(count=Count("id")))
+            quote_ids = indexed_quote_ids(self)
+            for source_id, count in counts:
+                SourceStats.record(source_id, quotes=-count)
+            result = super().delete()
+            content_changed.send(sender=Quote, source_ids=[source_id for source_id, _ in counts])
+            quotes_changed.send(sender=Quote, quote_ids=quote_ids)
+            return result
+
+    def update(self, **kwargs):
+        # bulk_update() comes through here too
+        if not kwargs.keys() & INDEXED_QUOTE_FIELDS:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            quote_ids = indexed_quote_ids(self)
+            result = super().update(**kwargs)
+            quotes_changed.send(sender=Quote, quote_ids=quote_ids)
+            return result
 
 
 class Quote(models.Model):
     source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name="quotes")
     episode = models.ForeignKey(Episode, on_delete=models.CASCADE, related_name="quotes", null=True, blank=True)
+    subtitle_file = models.ForeignKey(
+        SubtitleFile, on_delete=models.SET_NULL, related_name="quotes", null=True, blank=True
+    )
     text = models.TextField()
     start_time = models.FloatField(validators=[MinValueValidator(0.0)])
     end_time = models.FloatField(validators=[MinValueValidator(0.0)])
     views = models.PositiveIntegerField(default=0)
     thumbnail = models.ImageField(upload_to="quote_thumbnails/", null=True, blank=True)
+    thumbnail_digest = models.CharField(max_length=64, blank=True, editable=False)
+    # Caps the widths of its variants (see `clips.utils.derivatives.variant_widths`)
+    thumbnail_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # When a request last started on-demand thumbnail generation (see `clips.utils.thumbnails.request_thumbnail`)
+    thumbnail_requested_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Stream-copied excerpt cut on keyframes around the quote (see `clips.utils.quote_clips`)
+    clip = models.FileField(upload_to="quote_clips/", null=True, blank=True)
+    clip_start = models.FloatField(null=True, blank=True, help_text="Where the clip starts in the full video")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = QuoteQuerySet.as_manager()
+
     class Meta:
         ordering = ["start_time"]
 
@@ -98,19 +480,22 @@ class Quote(models.Model):
         return f"{self.source.title}: {self.text[:30]}..."
 
     def save(self, *args, **kwargs):
-        if not self.thumbnail and (self.source.video_file or self.episode.video_file):
-            video_path = None
-            if self.episode:
-                video_path = self.episode.video_file.path
-            elif self.source.video_file:
-                video_path = self.source.video_file.path
-            else:
-                return
-            thumb_path = f"/tmp/thumb_{self.id}.jpg"
-            generate_thumbnail(video_path, self.start_time, thumb_path)
-            with open(thumb_path, "rb") as f:
-                self.thumbnail.save(f"quote_{self.id}.jpg", File(f), save=False)
+        is_new = self._state.adding
         super().save(*args, **kwargs)
+        if is_new:
+            SourceStats.record(self.source_id, quotes=1)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or INDEXED_QUOTE_FIELDS.intersection(update_fields):
+            quotes_changed.send(sender=Quote, quote_ids=[self.pk])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            quote_id = self.pk
+            SourceStats.record(self.source_id, quotes=-1)
+            result = super().delete(*args, **kwargs)
+            content_changed.send(sender=Quote, source_ids=[self.source_id])
+            quotes_changed.send(sender=Quote, quote_ids=[quote_id])
+            return result
 
     @property
     def duration(self):
@@ -119,6 +504,147 @@ class Quote(models.Model):
     def get_timestamp_url(self):
         return f"/watch/{self.source.id}/?t={self.start_time}"
 
+    @property
+    def thumbnail_url(self):
+        """
+        Stored thumbnail if there is one, otherwise the endpoint that generates it on first request.
+        """
+        if self.thumbnail:
+            return self.thumbnail.url
+        return reverse("clips:quote_thumbnail", args=[self.pk])
+
+    @property
+    def thumbnail_srcset(self):
+        """Responsive WebP/JPEG variants of the thumbnail (see `clips.utils.derivatives`)."""
+        return derivative_srcset(self.thumbnail_digest, self.thumbnail_width)
+
+    @property
+    def clip_url(self):
+        return self.clip.url if self.clip else None
+
+    @property
+    def clip_offset(self):
+        """Where the quote starts inside its clip, in seconds."""
+        if not self.clip or self.clip_start is None:
+            return None
+        return max(self.start_time - self.clip_start, 0.0)
+
+    def playback(self):
+        """
+        What a player needs to play the quote: the clip when one has been cut,
+        otherwise the full video with the quote's own timestamps.
+        """
+        if self.clip_offset is not None:
+            return {
+                "url": self.clip.url,
+                "start": self.clip_offset,
+                "end": self.clip_offset + self.duration,
+                "isClip": True,
+            }
+        video = self.episode if self.episode_id and self.episode.video_file else self.source
+        return {"url": video.video_url, "start": self.start_time, "end": self.end_time, "isClip": False}
+
+
+def increments(changes):
+    """Atomic `field = field + delta` updates that never go below zero."""
+    updates = {field: Greatest(F(field) + delta, 0) for field, delta in changes.items() if delta}
+    return {**updates, "updated_at": timezone.now()}
+
+
+def tally(objs, runtime=lambda obj: 0):
+    """{source_id: (count, runtime)} of freshly created objects."""
+    totals = defaultdict(lambda: [0, 0])
+    for obj in objs:
+        totals[obj.source_id][0] += 1
+        totals[obj.source_id][1] += runtime(obj) or 0
+    return totals
+
+
+class CatalogStats(models.Model):
+    """
+    Totals for the whole catalog in a single row (pk=1), kept in step with SourceStats.
+    `manage reconcile_stats` recomputes both from scratch.
+    """
+
+    source_count = models.PositiveIntegerField(default=0)
+    episode_count = models.PositiveIntegerField(default=0)
+    quote_count = models.PositiveIntegerField(default=0)
+    runtime = models.PositiveBigIntegerField(default=0, help_text="Seconds of video")
+    version = models.PositiveBigIntegerField(default=0, help_text="Bumped on every change to the catalog's content")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "catalog stats"
+
+    def __str__(self):
+        return f"{self.source_count} sources, {self.episode_count} episodes, {self.quote_count} quotes"
+
+    @classmethod
+    def current(cls):
+        return cls.objects.get_or_create(pk=1)[0]
+
+
+class SourceStats(models.Model):
+    """
+    Per-source counts, updated with F() increments as rows are created and deleted
+    so pages never have to aggregate over quotes.
+    """
+
+    source = models.OneToOneField(Source, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    episode_count = models.PositiveIntegerField(default=0)
+    quote_count = models.PositiveIntegerField(default=0)
+    runtime = models.PositiveBigIntegerField(default=0, help_text="Seconds of video")
+    version = models.PositiveBigIntegerField(default=0, help_text="Bumped on every change to the source's content")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "source stats"
+
+    def __str__(self):
+        return f"{self.source_id}: {self.episode_count} episodes, {self.quote_count} quotes"
+
+    @property
+    def runtime_display(self):
+        hours, minutes = divmod(round(self.runtime / 60), 60)
+        return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m"
+
+    @classmethod
+    def record(cls, source_id, sources=0, episodes=0, quotes=0, runtime=0):
+        """Add the given deltas to a source's row and to the catalog totals."""
+        changes = {"episode_count": episodes, "quote_count": quotes, "runtime": runtime}
+        if not (sources or any(changes.values())):
+            return
+        with transaction.atomic():
+            if not cls.objects.filter(source_id=source_id).update(**increments(changes)):
+                cls.objects.create(source_id=source_id, **{field: max(delta, 0) for field, delta in changes.items()})
+            CatalogStats.current()
+            CatalogStats.objects.filter(pk=1).update(**increments({**changes, "source_count": sources}))
+
+    @classmethod
+    def touch(cls, source_ids):
+        """Bump the content version of `source_ids` and of the catalog; pages use them as validators."""
+        now = timezone.now()
+        cls.objects.filter(source_id__in=source_ids).update(version=F("version") + 1, updated_at=now)
+        CatalogStats.objects.filter(pk=1).update(version=F("version") + 1, updated_at=now)
+
+    @classmethod
+    def forget(cls, source_ids):
+        """Take sources about to be deleted out of the totals; their own rows go with them."""
+        with transaction.atomic():
+            for stats in cls.objects.filter(source_id__in=source_ids):
+                changes = {"episode_count": -stats.episode_count, "quote_count": -stats.quote_count}
+                CatalogStats.objects.filter(pk=1).update(**increments({**changes, "runtime": -stats.runtime}))
+            CatalogStats.objects.filter(pk=1).update(**increments({"source_count": -len(source_ids)}))
+
+    @classmethod
+    def forget_episodes(cls, episodes):
+        """Take episodes about to be deleted (and their quotes) out of the counts."""
+        per_source = episodes.order_by().values_list("source_id").annotate(count=Count("id"), runtime=Sum("duration"))
+        quotes = Quote.objects.filter(episode__in=episodes).order_by().values_list("source_id").annotate(Count("id"))
+        quotes = dict(quotes)
+        for source_id, count, runtime in per_source:
+            cls.record(source_id, episodes=-count, quotes=-quotes.get(source_id, 0), runtime=-(runtime or 0))
+
 
 class Favorite(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+# Sent with `source_ids` when quotes or episodes change without a post_save/post_delete per row:
+# bulk_create(), bulk_update() and queryset deletes. Quote.delete() sends it too, because a
+# post_delete receiver on Quote would make Django load every quote of a deleted source.
+content_changed = Signal()
+
+# Sent with `quote_ids` when quotes are saved, updated or deleted (cascades from Source and Episode
+# deletes included), so the search index can re-index or tombstone them. The ids of deleted quotes
+# are only collected while the index is enabled (see clips.models.indexed_quote_ids).
+quotes_changed = Signal()
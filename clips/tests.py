@@ -0,0 +1,421 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files import File
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from clips.models import CatalogStats, Episode, Quote, Source, SourceRecommendation, SourceStats, SourceType
+from clips.utils import quote_index
+from clips.utils.conditional import source_versions
+from clips.utils.derivatives import build_derivatives, derivative_srcset
+from clips.utils.pagination import CursorPage, decode_cursor, encode_cursor
+from clips.utils.quote_index import QuoteIndex, Segment, write_segment
+from clips.utils.streaming import parse_range
+from clips.utils.subtitle_importer import diff_quotes, import_quotes_from_srt
+from clips.utils.subtitle_parser import iter_cues
+
+SRT = """1
+00:00:01,000 --> 00:00:02,500
+<i>Hello</i> there,
+general Kenobi.
+
+2
+00:00:03,000 --> 00:00:04,000
+You are a bold one.
+"""
+
+VTT = """WEBVTT
+
+NOTE this block is skipped
+
+00:01.000 --> 00:02.500 align:start
+<v Obi-Wan>Hello &amp; welcome
+
+01:00:03.000 --> 01:00:04.250
+Second cue
+"""
+
+ASS = r"""[Script Info]
+Title: Test
+
+[V4+ Styles]
+Format: Name, Fontname
+Style: Default,Arial
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.50,0:00:03.00,Default,,0,0,0,,{\an8}Line one\Nline two, with comma
+Comment: 0,0:00:04.00,0:00:05.00,Default,,0,0,0,,Not a cue
+"""
+
+
+class TempDirMixin:
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp(prefix="clips_tests_")
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+
+class IterCuesTests(TempDirMixin, SimpleTestCase):
+    def test_srt(self):
+        cues = list(iter_cues(self.write("movie.srt", SRT)))
+        self.assertEqual(cues, [(1.0, 2.5, "Hello there, general Kenobi."), (3.0, 4.0, "You are a bold one.")])
+
+    def test_srt_without_blank_line_between_cues(self):
+        content = "1\n00:00:01,000 --> 00:00:02,000\nFirst\n2\n00:00:03,000 --> 00:00:04,000\nSecond\n"
+        cues = list(iter_cues(self.write("movie.srt", content)))
+        self.assertEqual(cues, [(1.0, 2.0, "First"), (3.0, 4.0, "Second")])
+
+    def test_vtt(self):
+        cues = list(iter_cues(self.write("movie.vtt", VTT)))
+        self.assertEqual(cues, [(1.0, 2.5, "Hello & welcome"), (3603.0, 3604.25, "Second cue")])
+
+    def test_ass(self):
+        cues = list(iter_cues(self.write("movie.ass", ASS)))
+        self.assertEqual(cues, [(1.5, 3.0, "Line one line two, with comma")])
+
+
+class DiffQuotesTests(SimpleTestCase):
+    def test_matches_unchanged_edited_and_retimed_quotes(self):
+        existing = [
+            (1, 1.0, 2.0, "unchanged"),
+            (2, 3.0, 4.0, "old text"),
+            (3, 5.0, 6.0, "shifted"),
+            (4, 7.0, 8.0, "removed"),
+        ]
+        segments = [
+            (1.0, 2.0, "unchanged"),
+            (3.0, 4.0, "new text"),
+            (5.5, 6.5, "shifted"),
+            (9.0, 10.0, "added"),
+        ]
+        unchanged, updates, creates, deletes = diff_quotes(existing, segments)
+        self.assertEqual(unchanged, [1])
+        self.assertEqual(updates, [(2, 3.0, 4.0, "new text"), (3, 5.5, 6.5, "shifted")])
+        self.assertEqual(creates, [(9.0, 10.0, "added")])
+        self.assertEqual(deletes, [4])
+
+    def test_times_are_compared_to_the_millisecond(self):
+        unchanged, updates, creates, deletes = diff_quotes([(1, 1.0001, 2.0, "same")], [(1.0, 2.0, "same")])
+        self.assertEqual((unchanged, updates, creates, deletes), ([1], [], [], []))
+
+
+@override_settings(QUOTE_INDEX_PATH=None)
+class ImportQuotesTests(TempDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = Source.objects.create(title="Test movie", source_type=SourceType.MOVIE)
+        self.path = self.write("movie.srt", SRT)
+
+    def test_reimporting_an_unchanged_file_is_skipped(self):
+        first = import_quotes_from_srt(self.source.id, self.path, min_length=10)
+        self.assertEqual((first.created, first.skipped), (1, False))
+
+        second = import_quotes_from_srt(self.source.id, self.path, min_length=10)
+        self.assertTrue(second.skipped)
+        self.assertEqual(second.unchanged, 1)
+        self.assertEqual(Quote.objects.filter(source=self.source).count(), 1)
+
+    def test_forced_reimport_keeps_quote_ids(self):
+        import_quotes_from_srt(self.source.id, self.path, min_length=10)
+        quote_id = Quote.objects.get(source=self.source).id
+
+        result = import_quotes_from_srt(self.source.id, self.path, min_length=10, force=True)
+        self.assertEqual((result.created, result.updated, result.deleted, result.unchanged), (0, 0, 0, 1))
+        self.assertEqual(list(Quote.objects.filter(source=self.source).values_list("id", flat=True)), [quote_id])
+
+    def test_changed_file_only_touches_changed_quotes(self):
+        import_quotes_from_srt(self.source.id, self.path, min_length=10)
+        quote_id = Quote.objects.get(source=self.source).id
+
+        self.write("movie.srt", SRT.replace("bold one", "brave one"))
+        result = import_quotes_from_srt(self.source.id, self.path, min_length=10)
+        self.assertEqual((result.created, result.updated, result.deleted), (0, 1, 0))
+        quote = Quote.objects.get(source=self.source)
+        self.assertEqual(quote.id, quote_id)
+        self.assertIn("brave one", quote.text)
+
+
+class StatsTests(TestCase):
+    def runtimes(self, *sources):
+        return [SourceStats.objects.get(source=source).runtime for source in sources] + [
+            CatalogStats.current().runtime
+        ]
+
+    def test_duration_edits_reach_the_runtime_totals(self):
+        movie = Source.objects.create(title="Movie", source_type=SourceType.MOVIE, duration=100)
+        show = Source.objects.create(title="Show", source_type=SourceType.TV_SHOW)
+        episode = Episode.objects.create(source=show, season=1, episode_number=1, duration=30)
+        self.assertEqual(self.runtimes(movie, show), [100, 30, 130])
+
+        movie = Source.objects.get(pk=movie.pk)
+        movie.duration = 160
+        movie.save()
+        episode.duration = 45
+        episode.save()
+        self.assertEqual(self.runtimes(movie, show), [160, 45, 205])
+
+        # Saves that leave the duration alone don't count it again
+        movie.title = "Movie (director's cut)"
+        movie.save()
+        Episode.objects.get(pk=episode.pk).save(update_fields=["title"])
+        self.assertEqual(self.runtimes(movie, show), [160, 45, 205])
+
+
+class DerivativesTests(TempDirMixin, SimpleTestCase):
+    def test_small_images_are_not_upscaled(self):
+        with override_settings(MEDIA_ROOT=self.tmp_dir):
+            path = os.path.join(self.tmp_dir, "small.png")
+            Image.new("RGB", (200, 100)).save(path)
+            digest, width = build_derivatives(File(open(path, "rb"), name="small.png"))
+            written = sorted(os.listdir(os.path.join(self.tmp_dir, "derivatives", digest[:2])))
+            srcset = derivative_srcset(digest, width)
+
+        self.assertEqual(width, 200)
+        self.assertEqual(written, [f"{digest}_{w}.{ext}" for w in (160, 200) for ext in ("jpg", "webp")])
+        self.assertTrue(srcset["jpeg"].endswith(f"{digest}_200.jpg 200w"))
+        self.assertNotIn("320w", srcset["webp"])
+
+
+class SourceVersionsTests(TestCase):
+    def test_watch_page_validators_follow_the_recommended_sources(self):
+        source = Source.objects.create(title="Movie", source_type=SourceType.MOVIE)
+        other = Source.objects.create(title="Sequel", source_type=SourceType.MOVIE)
+
+        # Without recommendations the page lists the newest sources: any catalog change counts
+        before = source_versions(None, source.pk)
+        SourceStats.touch([other.pk])
+        self.assertNotEqual(source_versions(None, source.pk), before)
+
+        SourceRecommendation.objects.create(source=source, recommended=other, rank=0, score=0.5)
+        before = source_versions(None, source.pk)
+        other.title = "Sequel (remastered)"
+        other.save()
+        self.assertNotEqual(source_versions(None, source.pk), before)
+
+
+class VideoProbeTests(TestCase):
+    def probes(self, source):
+        with self.captureOnCommitCallbacks() as callbacks:
+            source.save()
+        return source.update_video_duration in callbacks
+
+    def test_new_and_replaced_videos_are_probed(self):
+        source = Source(title="Movie", source_type=SourceType.MOVIE, video_file="videos/movie.mp4", duration=100)
+        self.assertTrue(self.probes(source))
+        self.assertFalse(self.probes(source))
+
+        source = Source.objects.get(pk=source.pk)
+        self.assertFalse(self.probes(source))
+        source.video_file = "videos/movie-remastered.mp4"
+        self.assertTrue(self.probes(source))
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=500-", 1000), (500, 999))
+        self.assertEqual(parse_range("bytes=900-5000", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-5000", 1000), (0, 999))
+
+    def test_ignored_headers(self):
+        for header in ("bytes=", "bytes=5-1", "bytes=0-1,5-6", "items=0-1", "garbage"):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 1000))
+
+    def test_unsatisfiable_ranges(self):
+        for header, size in (("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=-10", 0)):
+            with self.subTest(header=header, size=size):
+                with self.assertRaises(ValueError):
+                    parse_range(header, size)
+
+
+def as_dict(match):
+    ids, counts = match
+    return dict(zip(ids.tolist(), counts.tolist()))
+
+
+class QuoteIndexTests(TempDirMixin, SimpleTestCase):
+    docs = [
+        (1, 10, None, "May the Force be with you"),
+        (2, 10, None, "I find your lack of faith disturbing"),
+        (3, 20, 7, "The force is strong with this one"),
+        (70000, 20, 8, "Do or do not, there is no try"),
+    ]
+
+    def test_segment_round_trip(self):
+        path = os.path.join(self.tmp_dir, "quotes.idx")
+        self.assertEqual(write_segment(path, self.docs, tombstones=[5, 4]), (4, 23))
+
+        segment = Segment(path)
+        self.assertEqual(list(segment.doc_ids), [1, 2, 3, 70000])
+        self.assertEqual(list(segment.doc_sources), [10, 10, 20, 20])
+        self.assertEqual(list(segment.doc_episodes), [0, 0, 7, 8])
+        self.assertEqual(list(segment.tombstones), [4, 5])
+        self.assertEqual(as_dict(segment.match_term("force")), {1: 1, 3: 1})
+        self.assertEqual(as_dict(segment.match_term("do")), {70000: 2})
+        self.assertEqual(as_dict(segment.match_phrase(["with", "you"])), {1: 1})
+        self.assertEqual(as_dict(segment.match_phrase(["do", "not"])), {70000: 1})
+        self.assertIsNone(segment.postings("missing"))
+        # The token stream can be rebuilt from the postings (used to merge deltas)
+        tokens = {quote_id: tokens for quote_id, _, _, tokens in segment.documents()}
+        self.assertEqual(tokens[70000], ["do", "or", "do", "not", "there", "is", "no", "try"])
+
+    def test_search(self):
+        path = os.path.join(self.tmp_dir, "quotes.idx")
+        write_segment(path, self.docs)
+        index = QuoteIndex([path])
+
+        self.assertEqual({quote_id for quote_id, _ in index.search("force")}, {1, 3})
+        self.assertEqual({quote_id for quote_id, _ in index.search("force with")}, {1, 3})
+        self.assertEqual([quote_id for quote_id, _ in index.search('"force is strong"')], [3])
+        self.assertEqual({quote_id for quote_id, _ in index.search("faith OR try")}, {2, 70000})
+        self.assertEqual([quote_id for quote_id, _ in index.search("force", source_id=20)], [3])
+        self.assertEqual(index.search("force", episode_ids=[8]), [])
+
+    def test_top_k_and_seek(self):
+        path = os.path.join(self.tmp_dir, "quotes.idx")
+        write_segment(path, [(i, 1 + i % 2, None, "word " * (1 + i % 3)) for i in range(1, 31)])
+        matches = QuoteIndex([path]).match("word")
+        ranked = matches.top(len(matches))
+        self.assertEqual(len(ranked), 30)
+        self.assertEqual(ranked, sorted(ranked, key=lambda row: (-row[1], row[0])))
+
+        self.assertEqual(matches.top(5), ranked[:5])
+        after = (-ranked[9][1], ranked[9][0])
+        self.assertEqual(matches.top(5, after), ranked[10:15])
+        self.assertEqual(matches.top(5, after, backwards=True), ranked[4:9])
+        scoped = QuoteIndex([path]).match("word", source_id=2)
+        self.assertEqual({quote_id for quote_id, _ in scoped.top(30)}, set(range(1, 31, 2)))
+
+    def test_deltas_hide_earlier_versions_and_merge(self):
+        path = os.path.join(self.tmp_dir, "quotes.idx")
+        quote_index.build_quote_index(path, self.docs)
+        with override_settings(QUOTE_INDEX_PATH=path):
+            quote_index.add_delta([(1, 10, None, "May the odds be with you")], tombstones=[2])
+            quote_index.add_delta([(4, 10, None, "Faith restored")])
+            unmerged = QuoteIndex(quote_index.segment_paths(path))
+
+            deltas = quote_index.segment_paths(path)[1:]
+            quote_index.merge_deltas(deltas)
+            self.assertEqual(quote_index.segment_paths(path)[1:], deltas[-1:])
+            merged = QuoteIndex(quote_index.segment_paths(path))
+
+        for index in (unmerged, merged):
+            self.assertEqual([quote_id for quote_id, _ in index.search("force")], [3])
+            self.assertEqual([quote_id for quote_id, _ in index.search("odds")], [1])
+            self.assertEqual([quote_id for quote_id, _ in index.search("faith")], [4])
+
+
+class QuoteIndexUpdateTests(TempDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        movie = Source.objects.create(title="Movie", source_type=SourceType.MOVIE)
+        self.show = Source.objects.create(title="Show", source_type=SourceType.TV_SHOW)
+        episode = Episode.objects.create(source=self.show, season=1, episode_number=1)
+        self.kept = Quote.objects.create(source=movie, text="The force is strong", start_time=1, end_time=2)
+        self.deleted = Quote.objects.create(source=movie, text="Use the force", start_time=3, end_time=4)
+        Quote.objects.create(source=self.show, episode=episode, text="Force of habit", start_time=1, end_time=2)
+
+        self.path = os.path.join(self.tmp_dir, "quotes.idx")
+        quote_index.build_quote_index(
+            self.path, Quote.objects.order_by("id").values_list("id", "source_id", "episode_id", "text")
+        )
+        index_settings = override_settings(QUOTE_INDEX_PATH=self.path)
+        index_settings.enable()
+        self.addCleanup(index_settings.disable)
+        # Watch payloads are rebuilt on commit in another thread, which can't see the test's transaction
+        rebuild = mock.patch("clips.utils.watch_payload.schedule_rebuild")
+        rebuild.start()
+        self.addCleanup(rebuild.stop)
+
+    def search(self, query):
+        return {quote_id for quote_id, _ in QuoteIndex(quote_index.segment_paths(self.path)).search(query)}
+
+    def test_deletes_outside_imports_are_tombstoned(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.deleted.delete()
+        self.assertEqual(self.search("force"), set(Quote.objects.values_list("id", flat=True)))
+
+        # Quotes removed by the cascade of a Source delete
+        with self.captureOnCommitCallbacks(execute=True):
+            self.show.delete()
+        self.assertEqual(self.search("force"), {self.kept.id})
+
+    def test_edits_outside_imports_are_reindexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kept.text = "The odds are strong"
+            self.kept.save()
+        self.assertEqual(self.search("odds"), {self.kept.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Quote.objects.filter(pk=self.deleted.pk).update(text="Use the odds")
+        self.assertEqual(self.search("odds"), {self.kept.id, self.deleted.id})
+        self.assertNotIn(self.deleted.id, self.search("force"))
+
+
+class Row:
+    def __init__(self, key):
+        self.sort_key = key
+
+
+class Results:
+    """Keyset-searchable list of ints, the shape CursorPage expects from SearchResults."""
+
+    def __init__(self, count):
+        self.keys = list(range(count))
+
+    def seek(self, after, limit, backwards=False):
+        if backwards:
+            keys = [key for key in self.keys if after is None or key < after][-limit:]
+        else:
+            keys = [key for key in self.keys if after is None or key > after][:limit]
+        return [Row(key) for key in keys]
+
+
+class CursorPageTests(SimpleTestCase):
+    def keys(self, page):
+        return [row.sort_key for row in page]
+
+    def test_cursor_round_trip(self):
+        token = encode_cursor([1.5, 42], backwards=True, scope="q=force")
+        self.assertEqual(decode_cursor(token, scope="q=force"), ([1.5, 42], True))
+        # Another query, a tampered token or no token start from the beginning
+        self.assertEqual(decode_cursor(token, scope="q=other"), (None, False))
+        self.assertEqual(decode_cursor(token[:-2] + "xx", scope="q=force"), (None, False))
+        self.assertEqual(decode_cursor(None), (None, False))
+
+    def test_pages_forward_and_back(self):
+        results = Results(7)
+        first = CursorPage(results, None, 3)
+        self.assertEqual(self.keys(first), [0, 1, 2])
+        self.assertEqual((first.has_previous, first.has_next), (False, True))
+        self.assertIsNone(first.previous_cursor)
+
+        second = CursorPage(results, first.next_cursor, 3)
+        self.assertEqual(self.keys(second), [3, 4, 5])
+        third = CursorPage(results, second.next_cursor, 3)
+        self.assertEqual(self.keys(third), [6])
+        self.assertEqual((third.has_previous, third.has_next), (True, False))
+        self.assertIsNone(third.next_cursor)
+
+        back = CursorPage(results, third.previous_cursor, 3)
+        self.assertEqual(self.keys(back), [3, 4, 5])
+        self.assertEqual((back.has_previous, back.has_next), (True, True))
+        start = CursorPage(results, back.previous_cursor, 3)
+        self.assertEqual(self.keys(start), [0, 1, 2])
+        self.assertFalse(start.has_previous)
+
+    def test_cursor_from_another_scope_starts_over(self):
+        page = CursorPage(Results(7), None, 3, scope="q=a")
+        self.assertEqual(self.keys(CursorPage(Results(7), page.next_cursor, 3, scope="q=b")), [0, 1, 2])
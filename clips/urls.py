@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import path, re_path
 
 from . import views
 
@@ -7,6 +7,12 @@ app_name = "clips"
 urlpatterns = [
     path("", views.home_view, name="home"),  # Home / list of videos
     path("watch/<int:source_id>/", views.watch_source, name="watch_source"),
+    path("watch/<int:source_id>/quotes/", views.source_quotes, name="source_quotes"),
+    path("watch/<int:source_id>/search/", views.source_quote_search, name="source_quote_search"),
+    path("search/", views.QuoteSearchView.as_view(), name="quote_search"),
+    path("autocomplete/", views.autocomplete, name="autocomplete"),
+    re_path(r"^video/(?P<kind>source|episode)/(?P<pk>[0-9]+)/$", views.stream_video, name="stream_video"),
     path("quote/<int:pk>/", views.QuoteDetailView.as_view(), name="quote_detail"),
+    path("quote/<int:pk>/thumbnail/", views.quote_thumbnail, name="quote_thumbnail"),
     path("test/", views.ui_test, name="ui_test"),  # optional UI preview
 ]
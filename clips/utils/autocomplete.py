@@ -0,0 +1,191 @@
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.db.models import Count
+
+from clips.models import CatalogStats, Quote, Source
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r"\w+(?:'\w+)?")
+# Phrases are runs of 2 to 4 words seen in at least MIN_PHRASE_COUNT quotes
+PHRASE_WORDS = (2, 3, 4)
+MIN_PHRASE_COUNT = 3
+MAX_PHRASES = 50000
+# Bound on the phrase counter while scanning; rare phrases are dropped when it grows past this
+COUNTER_LIMIT = 2_000_000
+# Best completions are precomputed for prefixes up to this length; longer prefixes scan their (short) range
+CACHED_PREFIX_LENGTH = 4
+MAX_SUGGESTIONS = 10
+
+# Dictionaries are rebuilt when CatalogStats.version moves (any change to titles or quotes), at most this often
+MIN_REBUILD_INTERVAL = 60
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autocomplete")
+
+
+class CompletionIndex:
+    """
+    Sorted array of lowercased keys with a weight and a display string per entry.
+    A prefix maps to a contiguous range found with two binary searches.
+    """
+
+    def __init__(self, entries):
+        # entries: (key, weight, display, payload)
+        entries = sorted(entries, key=lambda entry: entry[0])
+        self.keys = [entry[0] for entry in entries]
+        self.entries = entries
+        self.top = self.precompute_top(entries)
+
+    @staticmethod
+    def precompute_top(entries):
+        top = {}
+        for index, (key, weight, _, _) in enumerate(entries):
+            for length in range(1, min(len(key), CACHED_PREFIX_LENGTH) + 1):
+                heap = top.setdefault(key[:length], [])
+                item = (weight, -index)
+                if len(heap) < MAX_SUGGESTIONS:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        return {prefix: [-index for _, index in sorted(heap, reverse=True)] for prefix, heap in top.items()}
+
+    def complete(self, prefix, limit):
+        """Up to `limit` (display, payload) pairs whose key starts with `prefix`, heaviest first."""
+        if len(prefix) <= CACHED_PREFIX_LENGTH:
+            indexes = self.top.get(prefix, [])
+        else:
+            start = bisect_left(self.keys, prefix)
+            end = bisect_right(self.keys, prefix + "\uffff")
+            indexes = heapq.nlargest(limit, range(start, end), key=lambda i: self.entries[i][1])
+
+        results = []
+        seen = set()
+        if limit <= 0:
+            return results
+        for index in indexes:
+            _, _, display, payload = self.entries[index]
+            # A title is indexed once per word; show it once
+            if display not in seen:
+                seen.add(display)
+                results.append((display, payload))
+            if len(results) == limit:
+                break
+        return results
+
+
+def normalize(text):
+    return " ".join(WORD_RE.findall(text.lower()))
+
+
+def title_entries():
+    """Every title, reachable from the start of each of its words, weighted by how many quotes it has."""
+    for source in Source.objects.annotate(quote_count=Count("quotes")).only("id", "title"):
+        words = normalize(source.title).split()
+        for i in range(len(words)):
+            # Completions from the first word outrank the ones from later words
+            weight = source.quote_count + (1 if i == 0 else 0)
+            yield " ".join(words[i:]), weight, source.title, source.id
+
+
+def phrase_entries():
+    """The most frequent 2-4 word phrases across all quotes."""
+    counts = Counter()
+    for text in Quote.objects.values_list("text", flat=True).iterator(chunk_size=5000):
+        words = normalize(text).split()
+        phrases = {
+            " ".join(words[start : start + size])  # noqa: E203
+            for size in PHRASE_WORDS
+            for start in range(len(words) - size + 1)
+        }
+        counts.update(phrases)
+        if len(counts) > COUNTER_LIMIT:
+            counts = Counter({phrase: count for phrase, count in counts.items() if count > 1})
+
+    frequent = [(phrase, count) for phrase, count in counts.items() if count >= MIN_PHRASE_COUNT]
+    for phrase, count in heapq.nlargest(MAX_PHRASES, frequent, key=lambda item: item[1]):
+        yield phrase, count, phrase, None
+
+
+class Autocomplete:
+    def __init__(self, titles=(), phrases=()):
+        self.titles = CompletionIndex(titles)
+        self.phrases = CompletionIndex(phrases)
+
+    @classmethod
+    def build(cls):
+        return cls(title_entries(), phrase_entries())
+
+
+# Served until this process's first build finishes
+_autocomplete = Autocomplete()
+_version = None
+_built_at = None
+_rebuilding = False
+_lock = threading.Lock()
+
+
+def catalog_version():
+    return CatalogStats.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+
+
+def get_autocomplete():
+    """
+    This process's dictionaries. Building them scans every quote, so it never happens in a request:
+    when CatalogStats.version differs from the one they were built at, a background rebuild starts and
+    the current dictionaries (empty before the first build) keep serving until it is done.
+    """
+    global _rebuilding
+
+    version = catalog_version()
+    with _lock:
+        stale = version != _version and not _rebuilding
+        recent = _built_at is not None and time.monotonic() - _built_at < MIN_REBUILD_INTERVAL
+        if stale and not recent:
+            _rebuilding = True
+            executor.submit(rebuild_in_background, version)
+        return _autocomplete
+
+
+def rebuild_in_background(version):
+    global _autocomplete, _version, _built_at, _rebuilding
+
+    try:
+        autocomplete = Autocomplete.build()
+        with _lock:
+            _autocomplete, _version = autocomplete, version
+    except Exception:
+        logger.exception("Rebuilding autocomplete failed")
+    finally:
+        with _lock:
+            _built_at = time.monotonic()
+            _rebuilding = False
+        connection.close()
+
+
+def suggest(prefix, limit=8, kinds=("title", "phrase")):
+    """Titles first, then phrases, as dicts for the JSON API."""
+    prefix = normalize(prefix) + (" " if prefix[-1:].isspace() and prefix.strip() else "")
+    if not prefix:
+        return []
+
+    limit = min(limit, MAX_SUGGESTIONS)
+    autocomplete = get_autocomplete()
+    suggestions = []
+    if "title" in kinds:
+        suggestions += [
+            {"text": title, "kind": "title", "sourceId": source_id}
+            for title, source_id in autocomplete.titles.complete(prefix, limit)
+        ]
+    if "phrase" in kinds:
+        suggestions += [
+            {"text": phrase, "kind": "phrase"}
+            for phrase, _ in autocomplete.phrases.complete(prefix, limit - len(suggestions))
+        ]
+    return suggestions[:limit]
@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from clips.models import CatalogStats, Episode, Quote, Source, SourceStats
+
+STAT_FIELDS = ["episode_count", "quote_count", "runtime"]
+
+
+def reconcile_stats(batch_size=500):
+    """
+    Recompute SourceStats and CatalogStats from scratch with three GROUP BY queries.
+    Returns {source_id: (stored, actual)} for the rows that had drifted (missing rows included).
+    """
+    # 1. One aggregate per table
+    actual = {source_id: [0, 0, duration or 0] for source_id, duration in Source.objects.values_list("id", "duration")}
+    episodes = Episode.objects.order_by().values_list("source_id").annotate(Count("id"), Sum("duration"))
+    for source_id, count, runtime in episodes:
+        actual[source_id][0] = count
+        actual[source_id][2] += runtime or 0
+    for source_id, count in Quote.objects.order_by().values_list("source_id").annotate(Count("id")):
+        actual[source_id][1] = count
+
+    # 2. Compare with what is stored
+    now = timezone.now()
+    stored = {stats.source_id: stats for stats in SourceStats.objects.all()}
+    drift = {}
+    changed, missing = [], []
+    for source_id, values in actual.items():
+        stats = stored.get(source_id)
+        current = [getattr(stats, field) for field in STAT_FIELDS] if stats else None
+        if current == values:
+            continue
+        drift[source_id] = (current, values)
+        if stats is None:
+            missing.append(SourceStats(source_id=source_id, **dict(zip(STAT_FIELDS, values)), updated_at=now))
+        else:
+            for field, value in zip(STAT_FIELDS, values):
+                setattr(stats, field, value)
+            stats.updated_at = now
+            changed.append(stats)
+
+    # 3. Write the differences and the totals
+    with transaction.atomic():
+        SourceStats.objects.bulk_update(changed, [*STAT_FIELDS, "updated_at"], batch_size=batch_size)
+        SourceStats.objects.bulk_create(missing, batch_size=batch_size)
+        CatalogStats.objects.update_or_create(
+            pk=1,
+            defaults={
+                "source_count": len(actual),
+                "episode_count": sum(values[0] for values in actual.values()),
+                "quote_count": sum(values[1] for values in actual.values()),
+                "runtime": sum(values[2] for values in actual.values()),
+            },
+        )
+    return drift
@@ -0,0 +1,75 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+# Widths of the responsive variants; smaller images get one variant at their own width instead of upscaling
+DERIVATIVE_WIDTHS = (160, 320, 640)
+# (file extension, Pillow format, save options)
+DERIVATIVE_FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+)
+DERIVATIVE_DIR = "derivatives"
+
+
+def derivative_name(digest, width, ext):
+    """Content-addressed storage name: identical source images map to the same files."""
+    return f"{DERIVATIVE_DIR}/{digest[:2]}/{digest}_{width}.{ext}"
+
+
+def variant_widths(image_width):
+    """Widths of the variants of an image `image_width` pixels wide: DERIVATIVE_WIDTHS, capped at its own width."""
+    return sorted({min(width, image_width) for width in DERIVATIVE_WIDTHS})
+
+
+def build_derivatives(image_file):
+    """
+    Write every width/format variant of `image_file` and return (SHA-256 digest, image width).
+    Variants that already exist in storage (same image seen before) are not written again.
+    """
+    image_file.open("rb")
+    try:
+        data = image_file.read()
+    finally:
+        image_file.close()
+
+    digest = hashlib.sha256(data).hexdigest()
+    # Opening only reads the header; pixels are decoded when a variant is missing
+    with Image.open(BytesIO(data)) as image:
+        image_width = image.width
+        pending = [
+            (width, ext, fmt, options)
+            for width in variant_widths(image_width)
+            for ext, fmt, options in DERIVATIVE_FORMATS
+            if not default_storage.exists(derivative_name(digest, width, ext))
+        ]
+        if pending:
+            image = image.convert("RGB")
+        for width, ext, fmt, options in pending:
+            resized = image
+            if image.width > width:
+                resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            buffer = BytesIO()
+            resized.save(buffer, fmt, **options)
+            default_storage.save(derivative_name(digest, width, ext), ContentFile(buffer.getvalue()))
+
+    return digest, image_width
+
+
+def derivative_srcset(digest, image_width):
+    """
+    srcset strings for the variants of an image, keyed by format: {"webp": "... 160w, ...", "jpeg": "..."}.
+    Returns None when no derivatives have been built.
+    """
+    if not digest or not image_width:
+        return None
+    widths = variant_widths(image_width)
+    return {
+        "webp" if ext == "webp" else "jpeg": ", ".join(
+            f"{default_storage.url(derivative_name(digest, width, ext))} {width}w" for width in widths
+        )
+        for ext, _, _ in DERIVATIVE_FORMATS
+    }
@@ -0,0 +1,135 @@
+"""
+HLS packaging: every video is transcoded once into a ladder of renditions with short segments,
+so players fetch a few seconds around a quote instead of seeking through a progressive MP4, and
+can switch bitrate. Keyframes are forced at every segment boundary, which makes the boundaries the
+same in all renditions; the segment start times are stored on HlsPackage as the manifest.
+"""
+
+import os
+import shutil
+import subprocess
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from clips.models import Episode, HlsPackage, Source, VideoMetadata
+from clips.utils.watch_payload import invalidate_watch_payload
+
+MASTER_PLAYLIST = "master.m3u8"
+AUDIO_KBPS = 128
+
+
+def renditions_for(height):
+    """The configured renditions that don't upscale a video `height` pixels tall (at least the smallest one)."""
+    renditions = sorted(settings.HLS_RENDITIONS, key=lambda rendition: rendition[1])
+    fitting = [rendition for rendition in renditions if not height or rendition[1] <= height]
+    return fitting or renditions[:1]
+
+
+def package_command(video_path, output_dir, renditions, has_audio):
+    """One ffmpeg process that decodes the video once and encodes every rendition from it."""
+    segment_seconds = settings.HLS_SEGMENT_SECONDS
+    count = len(renditions)
+
+    # 1. Scale the decoded video once per rendition, to the 4:2:0 pixel format every browser decodes
+    splits = "".join(f"[s{i}]" for i in range(count))
+    scales = ";".join(f"[s{i}]scale=-2:{height},format=yuv420p[v{i}]" for i, (_, height, _) in enumerate(renditions))
+    command = ["ffmpeg", "-v", "error", "-y", "-i", video_path]
+    command += ["-filter_complex", f"[0:v]split={count}{splits};{scales}"]
+
+    # 2. Encoders; keyframes on every segment boundary, and no extra ones at scene cuts
+    streams = []
+    for i, (name, _, kbps) in enumerate(renditions):
+        command += ["-map", f"[v{i}]"]
+        command += [f"-b:v:{i}", f"{kbps}k", f"-maxrate:v:{i}", f"{kbps}k", f"-bufsize:v:{i}", f"{kbps * 2}k"]
+        if has_audio:
+            command += ["-map", "0:a:0"]
+        streams.append(f"v:{i},a:{i},name:{name}" if has_audio else f"v:{i},name:{name}")
+    command += ["-c:v", "libx264", "-preset", "veryfast", "-profile:v", "main"]
+    command += ["-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})", "-sc_threshold", "0"]
+    if has_audio:
+        command += ["-c:a", "aac", "-b:a", f"{AUDIO_KBPS}k", "-ac", "2"]
+
+    # 3. Muxer
+    command += [
+        "-f",
+        "hls",
+        "-hls_time",
+        str(segment_seconds),
+        "-hls_playlist_type",
+        "vod",
+        "-hls_flags",
+        "independent_segments",
+        "-hls_segment_filename",
+        os.path.join(output_dir, "%v", "segment_%05d.ts"),
+        "-master_pl_name",
+        MASTER_PLAYLIST,
+        "-var_stream_map",
+        " ".join(streams),
+        os.path.join(output_dir, "%v", "index.m3u8"),
+    ]
+    return command
+
+
+def read_segments(playlist_path):
+    """Start time of every segment of a media playlist, from its #EXTINF durations."""
+    segments = []
+    position = 0.0
+    with open(playlist_path) as f:
+        for line in f:
+            if line.startswith("#EXTINF:"):
+                segments.append(round(position, 6))
+                position += float(line[len("#EXTINF:") :].split(",")[0])  # noqa: E203
+    return segments
+
+
+def package_video(video):
+    """
+    Transcode an Episode's, or a movie Source's, video into HLS renditions and record the package.
+    The new package replaces the old one only once it is complete.
+    """
+    kind = "episode" if isinstance(video, Episode) else "source"
+    video_path = video.video_file.path
+    metadata = VideoMetadata.for_file(video_path)
+    renditions = renditions_for(metadata.height)
+
+    # 1. Transcode next to the live package
+    name = f"hls/{kind}/{video.pk}"
+    output_dir = default_storage.path(name)
+    building_dir = f"{output_dir}.building"
+    shutil.rmtree(building_dir, ignore_errors=True)
+    for rendition_name, _, _ in renditions:
+        os.makedirs(os.path.join(building_dir, rendition_name))
+    try:
+        command = package_command(video_path, building_dir, renditions, bool(metadata.audio_codec))
+        subprocess.run(command, check=True, capture_output=True)
+        segments = read_segments(os.path.join(building_dir, renditions[0][0], "index.m3u8"))
+    except Exception:
+        shutil.rmtree(building_dir, ignore_errors=True)
+        raise
+
+    # 2. Swap it in
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.rename(building_dir, output_dir)
+    package, _ = HlsPackage.objects.update_or_create(
+        **{kind: video},
+        defaults={
+            "video_name": video.video_file.name,
+            "playlist": f"{name}/{MASTER_PLAYLIST}",
+            "renditions": [{"name": n, "height": h, "kbps": kbps} for n, h, kbps in renditions],
+            "segments": segments,
+        },
+    )
+    invalidate_watch_payload(video.source_id if kind == "episode" else video.pk)
+    return package
+
+
+def unpackaged_videos(source_id=None, overwrite=False):
+    """Movies and episodes with a video that has no HLS package yet (or has changed since); all with `overwrite`."""
+    sources = Source.objects.exclude(video_file="").exclude(video_file__isnull=True).select_related("hls_package")
+    episodes = Episode.objects.exclude(video_file="").exclude(video_file__isnull=True).select_related("hls_package")
+    if source_id:
+        sources = sources.filter(id=source_id)
+        episodes = episodes.filter(source_id=source_id)
+    videos = list(sources) + list(episodes)
+    return videos if overwrite else [video for video in videos if video.hls is None]
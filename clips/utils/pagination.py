@@ -0,0 +1,53 @@
+from django.core import signing
+
+CURSOR_SALT = "clips.cursor"
+
+
+def encode_cursor(key, backwards=False, scope=""):
+    """Opaque, signed token for a sort key; `scope` ties it to one query so it can't be replayed against another."""
+    return signing.dumps({"k": key, "b": backwards, "s": scope}, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token, scope=""):
+    """(sort key, backwards) from a token, or (None, False) for a missing, tampered or foreign one."""
+    if not token:
+        return None, False
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None, False
+    if data.get("s") != scope:
+        return None, False
+    return data["k"], data["b"]
+
+
+class CursorPage:
+    """
+    One keyset page of anything with a `seek(after, limit, backwards)` method (see SearchResults).
+    Fetches one row beyond the page to know whether there is more in that direction; nothing is counted.
+    """
+
+    def __init__(self, results, token, per_page, scope=""):
+        after, backwards = decode_cursor(token, scope)
+        rows = results.seek(after, per_page + 1, backwards)
+        has_more = len(rows) > per_page
+
+        if backwards:
+            self.object_list = rows[-per_page:] if has_more else rows
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.object_list = rows[:per_page]
+            self.has_previous, self.has_next = after is not None, has_more
+
+        self.next_cursor = self.previous_cursor = None
+        if self.object_list:
+            if self.has_next:
+                self.next_cursor = encode_cursor(self.object_list[-1].sort_key, scope=scope)
+            if self.has_previous:
+                self.previous_cursor = encode_cursor(self.object_list[0].sort_key, backwards=True, scope=scope)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
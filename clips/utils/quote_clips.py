@@ -0,0 +1,93 @@
+import os
+import subprocess
+import tempfile
+from bisect import bisect_left, bisect_right
+
+from django.core.files import File
+from django.db.models import Q
+
+from clips.models import Quote, SourceStats
+from clips.utils.video_batches import group_by_video, run_in_batches, video_quotes
+from clips.utils.video_probe import probe_keyframes
+
+# Inputs opened by one ffmpeg process; each is a seek to the clip's first keyframe
+CLIPS_PER_RUN = 50
+
+
+def clip_window(keyframes, start_time, end_time):
+    """
+    (clip_start, clip_end) around a quote: the last keyframe at or before `start_time` and the first
+    at or after `end_time` (None: to the end of the video). Stream copy can only cut on keyframes.
+    """
+    before = bisect_right(keyframes, start_time) - 1
+    after = bisect_left(keyframes, end_time)
+    clip_start = keyframes[before] if before >= 0 else 0.0
+    clip_end = keyframes[after] if after < len(keyframes) else None
+    return clip_start, clip_end
+
+
+def run_ffmpeg(video_path, clips):
+    """Cut every (start, end, output_path) of `clips` from `video_path` in one ffmpeg process, without re-encoding."""
+    command = ["ffmpeg", "-v", "error", "-y"]
+    for start, end, _ in clips:
+        command += ["-ss", f"{start:.6f}"]
+        if end is not None:
+            command += ["-t", f"{end - start:.6f}"]
+        command += ["-i", video_path]
+    for input_index, (_, _, output_path) in enumerate(clips):
+        command += ["-map", f"{input_index}:v:0", "-map", f"{input_index}:a:0?", "-c", "copy"]
+        # Timestamps start at zero and the index goes first, so playback starts before the download ends
+        command += ["-avoid_negative_ts", "make_zero", "-movflags", "+faststart", output_path]
+    subprocess.run(command, check=True, capture_output=True)
+
+
+def extract_clips(video_path, windows, output_dir):
+    """
+    Write one MP4 per (start, end) window, `CLIPS_PER_RUN` per ffmpeg process, in file order.
+    Returns output paths in the order of `windows`; a clip that could not be cut has no file.
+    """
+    order = sorted(range(len(windows)), key=lambda i: windows[i][0])
+    paths = [os.path.join(output_dir, f"clip_{i}.mp4") for i in range(len(windows))]
+    clips = [(*windows[i], paths[i]) for i in order]
+    run_in_batches(lambda batch: run_ffmpeg(video_path, batch), clips, CLIPS_PER_RUN)
+    return paths
+
+
+def generate_quote_clips(quotes):
+    """
+    Cut a stream-copied clip for each of `quotes`, padded out to the surrounding keyframes.
+    Keyframes are probed once per video and all of a video's clips are cut in batches.
+    Returns the number of clips generated.
+    """
+    generated = []
+    for video_path, group in group_by_video(quotes):
+        keyframes = probe_keyframes(video_path)
+        windows = [clip_window(keyframes, q.start_time, q.end_time) for q in group]
+
+        with tempfile.TemporaryDirectory(prefix="clips_") as tmp_dir:
+            paths = extract_clips(video_path, windows, tmp_dir)
+            for quote, (clip_start, _), path in zip(group, windows, paths):
+                if not os.path.exists(path) or not os.path.getsize(path):
+                    continue
+                with open(path, "rb") as f:
+                    quote.clip.save(f"quote_{quote.id}.mp4", File(f), save=False)
+                quote.clip_start = clip_start
+                generated.append(quote)
+
+    Quote.objects.bulk_update(generated, ["clip", "clip_start"], batch_size=500)
+    # The quote pages now play the clip
+    SourceStats.touch({quote.source_id for quote in generated})
+    return len(generated)
+
+
+def missing_clips():
+    return Quote.objects.filter(Q(clip="") | Q(clip__isnull=True)).select_related("source", "episode")
+
+
+def generate_video_clips(video, overwrite=False):
+    """
+    Cut clips for every quote of an Episode, or of a Source (all its episodes for a TV show).
+    Only quotes without a clip are processed unless `overwrite` is set.
+    """
+    quotes = missing_clips() if not overwrite else Quote.objects.select_related("source", "episode")
+    return generate_quote_clips(video_quotes(video, quotes))
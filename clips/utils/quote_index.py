@@ -0,0 +1,511 @@
+"""
+Inverted index over quote text, stored in files that every worker memory-maps (pages are shared).
+
+A segment file holds, in native byte order and 4-byte aligned:
+    header | doc ids | doc source ids | doc episode ids (0 = none) | tombstones
+    | term offsets | term records | term bytes (sorted) | postings
+Each term's postings are its doc ids as deltas (uint16 when they fit, else uint32),
+per-doc occurrence counts (uint16) and token positions (uint16) for phrase queries.
+
+The base segment is written by `manage build_quote_index`. Imports, and quote edits and deletes made
+elsewhere (see `quotes_changed`), append small delta segments;
+a doc id or tombstone in a later segment hides that id in every earlier one. Past MAX_DELTA_SEGMENTS
+the deltas are merged into one, so a worker never opens (and searches) more than a few segments.
+"""
+
+import fcntl
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from glob import escape, glob
+from itertools import accumulate
+from math import log
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+MAGIC = b"QIX1"
+HEADER = struct.Struct("=4sIII")  # magic, docs, terms, tombstones
+TERM = struct.Struct("=IIIQQQ")  # docs, occurrences, delta width, docs offset, counts offset, positions offset
+WORD_RE = re.compile(r"\w+")
+PHRASE_RE = re.compile(r'"([^"]*)"|(\S+)')
+# Positions and counts are stored as uint16
+MAX_POSITION = 65535
+# Bits of an occurrence key (doc id << POSITION_BITS | position) that hold the position
+POSITION_BITS = 20
+EMPTY_MATCH = (np.empty(0, dtype=np.int64), np.empty(0))
+# How often a worker checks for new delta segments
+RELOAD_INTERVAL = 1.0
+# Delta segments kept before they are merged into one
+MAX_DELTA_SEGMENTS = 8
+# Quote ids looked up per query when changed quotes are re-indexed
+REINDEX_BATCH_SIZE = 500
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower())
+
+
+def parse_query(query):
+    """
+    'a b' must contain both words, 'a OR b' either, '"a b"' the exact phrase.
+    Returns OR-groups of AND-ed items, each item a tuple of terms (longer than one for phrases).
+    """
+    groups = [[]]
+    for phrase, word in PHRASE_RE.findall(query):
+        if word == "OR":
+            groups.append([])
+            continue
+        # A word like "don't" tokenizes to two terms and is matched as a phrase
+        terms = tuple(tokenize(phrase or word))
+        if terms:
+            groups[-1].append(terms)
+    return [group for group in groups if any(group)]
+
+
+def padded(data):
+    return data + b"\0" * (-len(data) % 4)
+
+
+def write_segment(path, docs, tombstones=()):
+    """
+    Write `docs` ((quote_id, source_id, episode_id, text) in ascending quote_id order) to a new segment file.
+    The file is replaced atomically, so readers never see a partial segment.
+    """
+    doc_ids, doc_sources, doc_episodes = array("I"), array("I"), array("I")
+    postings = defaultdict(lambda: (array("I"), array("H"), array("H")))
+
+    for quote_id, source_id, episode_id, text in docs:
+        doc_ids.append(quote_id)
+        doc_sources.append(source_id)
+        doc_episodes.append(episode_id or 0)
+
+        positions = defaultdict(list)
+        for position, term in enumerate(tokenize(text)[:MAX_POSITION]):
+            positions[term].append(position)
+        for term, term_positions in positions.items():
+            ids, counts, all_positions = postings[term]
+            ids.append(quote_id)
+            counts.append(len(term_positions))
+            all_positions.extend(term_positions)
+
+    terms = sorted(postings, key=lambda term: term.encode())
+    encoded = [term.encode() for term in terms]
+    term_offsets = array("I", [0, *accumulate(len(term) for term in encoded)])
+    tombstones = array("I", sorted(tombstones))
+
+    head = [
+        HEADER.pack(MAGIC, len(doc_ids), len(terms), len(tombstones)),
+        doc_ids.tobytes(),
+        doc_sources.tobytes(),
+        doc_episodes.tobytes(),
+        tombstones.tobytes(),
+        term_offsets.tobytes(),
+    ]
+    data_offset = sum(len(part) for part in head) + TERM.size * len(terms) + len(padded(b"".join(encoded)))
+
+    records = []
+    data = []
+    for term in terms:
+        ids, counts, positions = postings[term]
+        deltas = [b - a for a, b in zip([0, *ids], ids)]
+        width = 2 if max(deltas) <= 0xFFFF else 4
+        parts = [padded(array("H" if width == 2 else "I", deltas).tobytes()), padded(counts.tobytes())]
+        parts.append(padded(positions.tobytes()))
+
+        offsets = list(accumulate([data_offset, *(len(part) for part in parts)]))
+        records.append(TERM.pack(len(ids), len(positions), width, *offsets[:3]))
+        data.extend(parts)
+        data_offset = offsets[3]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=".quote_index_", delete=False) as f:
+        for part in head:
+            f.write(part)
+        f.write(b"".join(records))
+        f.write(padded(b"".join(encoded)))
+        for part in data:
+            f.write(part)
+    os.replace(f.name, path)
+    return len(doc_ids), len(terms)
+
+
+def contains(sorted_values, values):
+    """Boolean mask of `values` found in the sorted array `sorted_values`."""
+    if not len(sorted_values):
+        return np.zeros(len(values), dtype=bool)
+    index = np.searchsorted(sorted_values, values)
+    index[index == len(sorted_values)] = 0
+    return sorted_values[index] == values
+
+
+class Segment:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mm)
+
+        magic, n_docs, self.n_terms, n_tombstones = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a quote index segment")
+
+        offset = HEADER.size
+        self.doc_ids = self.array(np.uint32, offset, n_docs)
+        self.doc_sources = self.array(np.uint32, offset + 4 * n_docs, n_docs)
+        self.doc_episodes = self.array(np.uint32, offset + 8 * n_docs, n_docs)
+        offset += 12 * n_docs
+        self.tombstones = self.array(np.uint32, offset, n_tombstones)
+        offset += 4 * n_tombstones
+        self.term_offsets = self.view[offset : offset + 4 * (self.n_terms + 1)].cast("I")  # noqa: E203
+        self.records_offset = offset + 4 * (self.n_terms + 1)
+        self.terms_offset = self.records_offset + TERM.size * self.n_terms
+
+    def array(self, dtype, offset, count):
+        """A read-only NumPy view of the mapped file; nothing is copied."""
+        return np.frombuffer(self.mm, dtype=dtype, count=count, offset=offset)
+
+    def term(self, index):
+        start = self.terms_offset + self.term_offsets[index]
+        end = self.terms_offset + self.term_offsets[index + 1]
+        return self.mm[start:end]
+
+    def find(self, term):
+        """Binary search the sorted term bytes; nothing is loaded into memory up front."""
+        key = term.encode()
+        low, high = 0, self.n_terms
+        while low < high:
+            middle = (low + high) // 2
+            if self.term(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self.n_terms and self.term(low) == key else None
+
+    def postings(self, term):
+        """(doc ids, counts, positions) arrays for a term, or None."""
+        index = self.find(term)
+        if index is None:
+            return None
+        return self.postings_at(index)
+
+    def postings_at(self, index):
+        docs, occurrences, width, docs_offset, counts_offset, positions_offset = TERM.unpack_from(
+            self.mm, self.records_offset + TERM.size * index
+        )
+        deltas = self.array(np.uint16 if width == 2 else np.uint32, docs_offset, docs)
+        ids = np.cumsum(deltas, dtype=np.int64)
+        counts = self.array(np.uint16, counts_offset, docs)
+        positions = self.array(np.uint16, positions_offset, occurrences)
+        return ids, counts, positions
+
+    def documents(self):
+        """(quote_id, source_id, episode_id, tokens) for every doc, rebuilt from the postings' positions."""
+        tokens = defaultdict(dict)
+        for index in range(self.n_terms):
+            term = self.term(index).decode()
+            ids, counts, positions = self.postings_at(index)
+            doc_of_position = np.repeat(ids, counts).tolist()
+            for quote_id, position in zip(doc_of_position, positions.tolist()):
+                tokens[quote_id][position] = term
+        docs = zip(self.doc_ids.tolist(), self.doc_sources.tolist(), self.doc_episodes.tolist())
+        for quote_id, source_id, episode_id in docs:
+            doc_tokens = tokens[quote_id]
+            yield quote_id, source_id, episode_id or None, [doc_tokens[position] for position in sorted(doc_tokens)]
+
+    def scope(self, source_id, episode_ids):
+        """Ids of the docs in a source and/or some episodes (a sorted array), or None when unscoped."""
+        if source_id is None and episode_ids is None:
+            return None
+        keep = np.ones(len(self.doc_ids), dtype=bool)
+        if source_id is not None:
+            keep &= self.doc_sources == source_id
+        if episode_ids is not None:
+            keep &= contains(episode_ids, self.doc_episodes.astype(np.int64))
+        return self.doc_ids[keep].astype(np.int64)
+
+    def match_term(self, term):
+        """(doc ids, occurrences) of a term, as arrays in id order."""
+        postings = self.postings(term)
+        if postings is None:
+            return EMPTY_MATCH
+        ids, counts, _ = postings
+        return ids, counts
+
+    def match_phrase(self, terms):
+        """(doc ids, occurrences) of `terms` at consecutive positions, as arrays in id order."""
+        postings = [self.postings(term) for term in terms]
+        if not all(postings):
+            return EMPTY_MATCH
+        # Docs with every term, smallest postings list first
+        docs = None
+        for ids, _, _ in sorted(postings, key=lambda posting: len(posting[0])):
+            docs = ids if docs is None else docs[contains(ids, docs)]
+
+        # Every occurrence as one sortable key, doc id then position; a phrase starts where
+        # term i occurs i positions after the first term
+        starts = None
+        for offset, (ids, counts, positions) in enumerate(postings):
+            doc_of_position = np.repeat(ids, counts)
+            keep = contains(docs, doc_of_position)
+            keys = (doc_of_position[keep] << POSITION_BITS) | positions[keep]
+            starts = keys if starts is None else starts[contains(keys, starts + offset)]
+        quote_ids, hits = np.unique(starts >> POSITION_BITS, return_counts=True)
+        return quote_ids, hits
+
+
+class Matches:
+    """
+    Every match of a query as unsorted (quote id, score) arrays. Ranking only ever sorts the few
+    rows a page needs: results are ordered by (-score, quote id), the key cursors continue from.
+    """
+
+    def __init__(self, ids, scores):
+        self.ids = ids
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.ids)
+
+    def top(self, limit, after=None, backwards=False):
+        """
+        Up to `limit` [(quote_id, score)] in result order, sorting right after (or, with `backwards`,
+        right before) the (-score, quote_id) key `after`.
+        """
+        negated, ids = -self.scores, self.ids
+        if after is not None:
+            key_score, key_id = after
+            if backwards:
+                keep = (negated < key_score) | ((negated == key_score) & (ids < key_id))
+            else:
+                keep = (negated > key_score) | ((negated == key_score) & (ids > key_id))
+            negated, ids = negated[keep], ids[keep]
+        if backwards:
+            # The rows closest to `after` are the largest keys before it
+            picked = best(-negated, -ids, limit)[::-1]
+        else:
+            picked = best(negated, ids, limit)
+        return list(zip(ids[picked].tolist(), (-negated[picked]).tolist()))
+
+
+def best(primary, secondary, limit):
+    """Indexes of the `limit` smallest (primary, secondary) pairs, in order, without sorting everything."""
+    if limit <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.arange(len(primary))
+    if len(primary) > limit:
+        # Everything tied with the limit-th smallest primary value competes on `secondary`
+        cutoff = np.partition(primary, limit - 1)[limit - 1]
+        candidates = np.flatnonzero(primary <= cutoff)
+    order = np.lexsort((secondary[candidates], primary[candidates]))
+    return candidates[order[:limit]]
+
+
+class QuoteIndex:
+    def __init__(self, paths):
+        self.segments = [Segment(path) for path in paths]
+
+        # Ids present in (or deleted by) a later segment are stale in earlier ones; sorted arrays
+        self.hidden = []
+        superseded = np.empty(0, dtype=np.int64)
+        for segment in reversed(self.segments[1:]):
+            self.hidden.insert(0, superseded)
+            superseded = np.union1d(superseded, np.concatenate([segment.doc_ids, segment.tombstones]))
+        self.hidden.insert(0, superseded)
+        self.total_docs = sum(len(segment.doc_ids) for segment in self.segments) or 1
+
+    def match(self, query, source_id=None, episode_ids=None):
+        """Every quote matching the query (see Matches). Scores are term frequency times idf."""
+        groups = parse_query(query)
+        if episode_ids is not None:
+            episode_ids = np.array(sorted(set(episode_ids)), dtype=np.int64)
+
+        ids, scores = [], []
+        for segment, hidden in zip(self.segments, self.hidden):
+            for group in groups:
+                group_ids, group_scores = self.match_group(segment, group, hidden, source_id, episode_ids)
+                ids.append(group_ids)
+                scores.append(group_scores)
+        if not ids:
+            return Matches(*EMPTY_MATCH)
+
+        # A quote matching several OR-groups scores their sum
+        ids, scores = np.concatenate(ids), np.concatenate(scores)
+        if len(groups) > 1:
+            ids, inverse = np.unique(ids, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores, minlength=len(ids))
+        return Matches(ids, scores)
+
+    def search(self, query, source_id=None, episode_ids=None, limit=None):
+        """The best `limit` (default: all) matching quote ids, best first, as [(quote_id, score)]."""
+        matches = self.match(query, source_id=source_id, episode_ids=episode_ids)
+        return matches.top(len(matches) if limit is None else limit)
+
+    def match_group(self, segment, group, hidden, source_id, episode_ids):
+        """
+        (quote ids, scores) for the AND of the group's items within the scope: the postings and the scope's
+        doc ids are intersected smallest first, hidden docs dropped, and only the survivors are scored.
+        """
+        items = [segment.match_term(item[0]) if len(item) == 1 else segment.match_phrase(item) for item in group]
+        items.sort(key=lambda item: len(item[0]))
+        if not items or not len(items[0][0]):
+            return EMPTY_MATCH
+
+        # The scope's docs are one more list to intersect with
+        lists = [item_ids for item_ids, _ in items]
+        scope = segment.scope(source_id, episode_ids)
+        if scope is not None:
+            lists.append(scope)
+        lists.sort(key=len)
+        ids = lists[0]
+        for other in lists[1:]:
+            ids = ids[contains(other, ids)]
+        if len(hidden):
+            ids = ids[~contains(hidden, ids)]
+
+        scores = np.zeros(len(ids))
+        for item_ids, counts in items:
+            idf = log(1 + self.total_docs / len(item_ids))
+            scores += counts[np.searchsorted(item_ids, ids)] * idf
+        return ids, scores
+
+
+def index_path():
+    return getattr(settings, "QUOTE_INDEX_PATH", None)
+
+
+def index_enabled():
+    path = index_path()
+    return bool(path) and os.path.exists(path)
+
+
+def segment_paths(path):
+    return [path, *sorted(glob(f"{escape(path)}.delta-*"))]
+
+
+_index = None
+_signature = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_quote_index():
+    """
+    This worker's view of the index, or None when QUOTE_INDEX_PATH is unset or not built yet.
+    New delta segments are picked up within RELOAD_INTERVAL seconds.
+    """
+    global _index, _signature, _checked_at
+
+    if not index_enabled():
+        return None
+    path = index_path()
+
+    with _lock:
+        if _index is None or time.monotonic() - _checked_at > RELOAD_INTERVAL:
+            try:
+                paths = segment_paths(path)
+                signature = [(p, os.stat(p).st_mtime_ns) for p in paths]
+                if signature != _signature:
+                    _index = QuoteIndex(paths)
+                    _signature = signature
+            except FileNotFoundError:
+                # A delta was merged or dropped between the glob and opening it; keep the current
+                # index and look again on the next call
+                return _index
+            _checked_at = time.monotonic()
+        return _index
+
+
+@contextmanager
+def index_lock(path):
+    """Exclusive lock (across processes) for changing the set of segment files."""
+    with open(f"{path}.lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def build_quote_index(path, docs):
+    """Write a fresh base segment and drop the delta segments it replaces."""
+    started_ns = time.time_ns()
+    stats = write_segment(path, docs)
+    with index_lock(path):
+        for delta in segment_paths(path)[1:]:
+            if int(delta.rpartition("-")[2]) < started_ns:
+                os.remove(delta)
+    return stats
+
+
+def add_delta(docs, tombstones=()):
+    """Append a delta segment (merging the deltas past MAX_DELTA_SEGMENTS); a no-op unless the index is built."""
+    if not index_enabled():
+        return
+    path = index_path()
+    with index_lock(path):
+        write_segment(f"{path}.delta-{time.time_ns()}", sorted(docs), tombstones)
+        deltas = segment_paths(path)[1:]
+        if len(deltas) > MAX_DELTA_SEGMENTS:
+            merge_deltas(deltas)
+
+
+_pending = threading.local()
+
+
+def quotes_changed(sender, quote_ids, **kwargs):
+    """
+    Receiver of clips.signals.quotes_changed: re-index the quotes once the transaction commits.
+    Ids are collected per thread and written in one delta by the first commit callback to run.
+    """
+    if not quote_ids or not index_enabled():
+        return
+    if not hasattr(_pending, "ids"):
+        _pending.ids = set()
+    _pending.ids.update(quote_ids)
+    transaction.on_commit(reindex_pending)
+
+
+def reindex_pending():
+    """
+    Write the pending quotes as they are in the database; those gone are tombstoned. Ids of a rolled-back
+    change stay pending until the thread's next commit, and are then just indexed as they are.
+    """
+    from clips.models import Quote
+
+    quote_ids = sorted(getattr(_pending, "ids", ()))
+    _pending.ids = set()
+    if not quote_ids:
+        return
+    docs = []
+    for start in range(0, len(quote_ids), REINDEX_BATCH_SIZE):
+        end = start + REINDEX_BATCH_SIZE
+        docs += Quote.objects.filter(id__in=quote_ids[start:end]).values_list("id", "source_id", "episode_id", "text")
+    add_delta(docs, set(quote_ids) - {quote_id for quote_id, *_ in docs})
+
+
+def merge_deltas(deltas):
+    """
+    Replace delta segments (oldest first) with one segment holding the latest version of each of their docs
+    and their remaining tombstones. It takes the newest delta's name, so it keeps its place in the order;
+    readers see either the old deltas or the merged one, which hides everything the older ones held.
+    """
+    docs, tombstones = {}, set()
+    for segment in map(Segment, deltas):
+        for quote_id in segment.tombstones:
+            docs.pop(quote_id, None)
+            tombstones.add(quote_id)
+        for quote_id, source_id, episode_id, tokens in segment.documents():
+            docs[quote_id] = (quote_id, source_id, episode_id, " ".join(tokens))
+            tombstones.discard(quote_id)
+
+    write_segment(deltas[-1], [docs[quote_id] for quote_id in sorted(docs)], tombstones)
+    for delta in deltas[:-1]:
+        os.remove(delta)
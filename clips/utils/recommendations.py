@@ -0,0 +1,133 @@
+"""
+Content-based source recommendations. Each source is one document made of all its quotes; documents
+are weighted with TF-IDF (sublinear tf, smoothed idf), L2-normalized, and compared by cosine
+similarity, which for unit rows is a matrix product. The TF-IDF matrix is sparse (CSR), so it takes
+memory per distinct term of each source rather than per vocabulary term; similarities are computed a
+block of rows at a time, each block a dense BLOCK_SIZE x sources array, and stored in SourceRecommendation.
+"""
+
+import heapq
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from clips.models import Quote, SourceRecommendation, SourceStats
+from clips.utils.quote_index import tokenize
+from clips.utils.watch_payload import invalidate_watch_payload
+
+RECOMMENDATIONS_PER_SOURCE = 5
+# Vocabulary: terms in at least MIN_DF sources and at most MAX_DF of them, the MAX_FEATURES most common
+MIN_DF = 2
+MAX_DF = 0.5
+MAX_FEATURES = 20000
+# Rows of the similarity matrix computed at once
+BLOCK_SIZE = 512
+
+
+def source_term_counts():
+    """{source_id: Counter of terms} over all quotes, read in one streamed query."""
+    counts = defaultdict(Counter)
+    for source_id, text in Quote.objects.order_by().values_list("source_id", "text").iterator(chunk_size=5000):
+        counts[source_id].update(tokenize(text))
+    return counts
+
+
+def tfidf_matrix(term_counts):
+    """(source_ids, matrix): sparse CSR, one L2-normalized TF-IDF row (float32) per source in source_ids order."""
+    source_ids = sorted(term_counts)
+    count = len(source_ids)
+
+    # 1. Vocabulary
+    df = Counter()
+    for counts in term_counts.values():
+        df.update(counts.keys())
+    max_docs = max(MAX_DF * count, MIN_DF)
+    terms = [term for term, docs in df.items() if MIN_DF <= docs <= max_docs]
+    terms = sorted(heapq.nlargest(MAX_FEATURES, terms, key=df.get))
+    column = {term: i for i, term in enumerate(terms)}
+
+    # 2. Term counts as coordinates
+    rows, cols, values = [], [], []
+    for row, source_id in enumerate(source_ids):
+        for term, n in term_counts[source_id].items():
+            col = column.get(term)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+                values.append(n)
+    cols = np.array(cols, dtype=np.int64)
+
+    # 3. Weights, then unit rows
+    idf = np.log((1 + count) / (1 + np.array([df[term] for term in terms], dtype=np.float64))) + 1
+    weights = (1 + np.log(np.array(values, dtype=np.float64))) * idf[cols]
+    matrix = sparse.csr_matrix((weights, (rows, cols)), shape=(count, len(terms)), dtype=np.float64)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+    norms[norms == 0] = 1
+    matrix = sparse.diags(1 / norms) @ matrix
+    return source_ids, matrix.astype(np.float32).tocsr()
+
+
+def top_neighbours(matrix, k):
+    """(indices, scores), each rows x k: every row's k most similar other rows, best first."""
+    count = matrix.shape[0]
+    k = min(k, count - 1)
+    if k <= 0:
+        return np.empty((count, 0), dtype=np.int64), np.empty((count, 0), dtype=np.float32)
+
+    indices = np.empty((count, k), dtype=np.int64)
+    scores = np.empty((count, k), dtype=np.float32)
+    transposed = matrix.T.tocsr()
+    for start in range(0, count, BLOCK_SIZE):
+        end = min(start + BLOCK_SIZE, count)
+        similarity = (matrix[start:end] @ transposed).toarray()
+        # A source is not its own recommendation
+        similarity[np.arange(end - start), np.arange(start, end)] = -1
+
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        indices[start:end] = np.take_along_axis(top, order, axis=1)
+        scores[start:end] = np.take_along_axis(top_scores, order, axis=1)
+    return indices, scores
+
+
+def build_recommendations(k=RECOMMENDATIONS_PER_SOURCE, batch_size=1000):
+    """
+    Recompute every source's recommendations and replace the table in one transaction.
+    Sources whose list changed get their watch page rebuilt. Returns (sources, recommendations, changed).
+    """
+    # 1. Vectors and neighbours
+    source_ids, matrix = tfidf_matrix(source_term_counts())
+    indices, scores = top_neighbours(matrix, k)
+
+    recommended = {}
+    for row, source_id in enumerate(source_ids):
+        recommended[source_id] = [
+            (source_ids[col], float(score)) for col, score in zip(indices[row], scores[row]) if score > 0
+        ]
+
+    # 2. Which sources' lists changed
+    previous = defaultdict(list)
+    for source_id, recommended_id in SourceRecommendation.objects.values_list("source_id", "recommended_id"):
+        previous[source_id].append(recommended_id)
+    changed = [
+        source_id
+        for source_id in set(previous) | set(recommended)
+        if previous.get(source_id, []) != [recommended_id for recommended_id, _ in recommended.get(source_id, [])]
+    ]
+
+    # 3. Replace the table
+    rows = [
+        SourceRecommendation(source_id=source_id, recommended_id=recommended_id, rank=rank, score=score)
+        for source_id, neighbours in recommended.items()
+        for rank, (recommended_id, score) in enumerate(neighbours)
+    ]
+    with transaction.atomic():
+        SourceRecommendation.objects.all().delete()
+        SourceRecommendation.objects.bulk_create(rows, batch_size=batch_size)
+        SourceStats.touch(changed)
+        for source_id in changed:
+            invalidate_watch_payload(source_id)
+    return len(source_ids), len(rows), len(changed)
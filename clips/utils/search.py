@@ -0,0 +1,404 @@
+import html
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from clips.models import Quote
+from clips.utils.quote_index import get_quote_index, parse_query
+
+# Text search configuration (stemming, stop words) used on Postgres
+SEARCH_CONFIG = "english"
+SQLITE_FTS_TABLE = "clips_quote_fts"
+
+# Private-use characters mark highlights inside snippets; the snippet is HTML-escaped
+# first and the markers replaced with <mark> afterwards, so quote text can never inject markup.
+HIGHLIGHT_START = "\ue000"
+HIGHLIGHT_STOP = "\ue001"
+WORD_RE = re.compile(r"\w+")
+
+SQLITE_FTS_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE}
+    USING fts5(text, content='clips_quote', content_rowid='id', tokenize='unicode61 remove_diacritics 2')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON clips_quote BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON clips_quote BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au AFTER UPDATE OF text ON clips_quote BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+]
+
+POSTGRES_SEARCH_SQL = [
+    f"""
+    ALTER TABLE clips_quote ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', coalesce(text, ''))) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS clips_quote_search_vector_gin ON clips_quote USING GIN (search_vector)",
+]
+
+
+def install_search_index(conn):
+    """
+    Create the full-text index for the connection's database (migration 0006 made the first one):
+    a generated tsvector column with a GIN index on Postgres, an FTS5 table kept in sync by triggers
+    on SQLite. Safe to run repeatedly. Other databases (or SQLite builds without FTS5) fall back to
+    unranked substring search.
+    """
+    with conn.cursor() as cursor:
+        if conn.vendor == "postgresql":
+            for sql in POSTGRES_SEARCH_SQL:
+                cursor.execute(sql)
+        elif conn.vendor == "sqlite" and sqlite_has_fts5(cursor):
+            for sql in SQLITE_FTS_SQL:
+                cursor.execute(sql)
+
+
+def sqlite_has_fts5(cursor):
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    return bool(cursor.fetchone()[0])
+
+
+def restore_sqlite_triggers(sender, using, **kwargs):
+    """
+    post_migrate handler. SQLite migrations rebuild a table to alter it, which drops its triggers;
+    put them back whenever the FTS table exists.
+    """
+    from django.db import connections
+
+    conn = connections[using]
+    if conn.vendor == "sqlite" and SQLITE_FTS_TABLE in conn.introspection.table_names():
+        install_search_index(conn)
+
+
+def highlight(marked_text):
+    """Escape a snippet and turn the highlight markers into <mark> tags."""
+    escaped = html.escape(marked_text)
+    return escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+
+
+class SQLiteBackend:
+    """FTS5 MATCH ranked by bm25; every word of the query must appear (prefix-free, diacritics folded)."""
+
+    snippet = f"snippet({SQLITE_FTS_TABLE}, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '…', 16)"
+    rank = f"bm25({SQLITE_FTS_TABLE})"
+
+    def __init__(self, query, filters):
+        self.match = " ".join(f'"{word}"' for word in WORD_RE.findall(query))
+        self.where = ""
+        self.params = [self.match]
+        if "source_id" in filters:
+            self.where += " AND clips_quote.source_id = %s"
+            self.params.append(filters["source_id"])
+        if "episode_id__in" in filters:
+            episode_ids = filters["episode_id__in"] or [None]
+            self.where += f" AND clips_quote.episode_id IN ({', '.join(['%s'] * len(episode_ids))})"
+            self.params.extend(episode_ids)
+
+    def select(self, columns, suffix="", params=()):
+        sql = (
+            f"SELECT {columns} FROM {SQLITE_FTS_TABLE} JOIN clips_quote ON clips_quote.id = {SQLITE_FTS_TABLE}.rowid "
+            f"WHERE {SQLITE_FTS_TABLE} MATCH %s{self.where}{suffix}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*self.params, *params])
+            return cursor.fetchall()
+
+    def count(self):
+        if not self.match:
+            return 0
+        return self.select("COUNT(*)")[0][0]
+
+    def page(self, offset, limit):
+        if not self.match:
+            return []
+        return self.select(
+            f"clips_quote.id, {self.snippet}",
+            f" ORDER BY {SQLITE_FTS_TABLE}.rank LIMIT %s OFFSET %s",
+            [limit, offset],
+        )
+
+    def count_up_to(self, cap):
+        if not self.match:
+            return 0
+        return len(self.select("1", " LIMIT %s", [cap]))
+
+    def seek(self, after, limit, backwards=False):
+        """Keyset page on (bm25, id): the rows that sort after (or before) `after`, with their keys."""
+        if not self.match:
+            return []
+        rank = self.rank
+        op, direction = ("<", "DESC") if backwards else (">", "ASC")
+        suffix, params = "", []
+        if after is not None:
+            suffix = f" AND ({rank} {op} %s OR ({rank} = %s AND clips_quote.id {op} %s))"
+            params = [after[0], after[0], after[1]]
+        keys = self.select(
+            f"clips_quote.id, {rank}", f"{suffix} ORDER BY 2 {direction}, 1 {direction} LIMIT %s", [*params, limit]
+        )
+        if backwards:
+            keys.reverse()
+
+        # Snippets for the page's rows only
+        ids = [pk for pk, _ in keys]
+        snippets = {}
+        if ids:
+            placeholders = ", ".join(["%s"] * len(ids))
+            snippets = dict(
+                self.select(f"clips_quote.id, {self.snippet}", f" AND clips_quote.id IN ({placeholders})", ids)
+            )
+        return [(pk, snippets.get(pk, ""), (rank_value, pk)) for pk, rank_value in keys]
+
+
+class PostgresBackend:
+    """websearch_to_tsquery against the stored tsvector (GIN indexed), ranked by ts_rank_cd."""
+
+    def __init__(self, query, filters):
+        # Imported here so the app runs without a Postgres driver installed
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+        from django.db.models import F, FloatField
+        from django.db.models.expressions import RawSQL
+        from django.db.models.functions import Cast
+
+        self.search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+        vector = RawSQL('"clips_quote"."search_vector"', [], output_field=SearchVectorField())
+        self.matches = Quote.objects.filter(**filters).annotate(search=vector).filter(search=self.search_query)
+        # ts_rank_cd returns a real (float4); as double precision the rank round-trips through the
+        # cursor's Python float exactly, so the seek comparison finds the same row again
+        self.rank = Cast(SearchRank(F("search"), self.search_query, cover_density=True), FloatField())
+
+    def count(self):
+        return self.matches.count()
+
+    def page(self, offset, limit):
+        end = offset + limit
+        ids = list(
+            self.matches.annotate(rank=self.rank).order_by("-rank", "id").values_list("id", flat=True)[offset:end]
+        )
+        headlines = self.headlines(ids)
+        return [(pk, headlines.get(pk, "")) for pk in ids]
+
+    def count_up_to(self, cap):
+        return self.matches[:cap].count()
+
+    def seek(self, after, limit, backwards=False):
+        """Keyset page on (rank descending, id)."""
+        ranked = self.matches.annotate(rank=self.rank)
+        if after is not None:
+            rank, pk = after
+            if backwards:
+                ranked = ranked.filter(Q(rank__gt=rank) | Q(rank=rank, id__lt=pk))
+            else:
+                ranked = ranked.filter(Q(rank__lt=rank) | Q(rank=rank, id__gt=pk))
+        ordering = ("rank", "-id") if backwards else ("-rank", "id")
+        keys = list(ranked.order_by(*ordering).values_list("id", "rank")[:limit])
+        if backwards:
+            keys.reverse()
+
+        headlines = self.headlines([pk for pk, _ in keys])
+        return [(pk, headlines.get(pk, ""), (rank, pk)) for pk, rank in keys]
+
+    def headlines(self, ids):
+        from django.contrib.postgres.search import SearchHeadline
+
+        # ts_headline is expensive; run it for the rows of this page only
+        return dict(
+            Quote.objects.filter(id__in=ids)
+            .annotate(
+                snippet=SearchHeadline(
+                    "text",
+                    self.search_query,
+                    config=SEARCH_CONFIG,
+                    start_sel=HIGHLIGHT_START,
+                    stop_sel=HIGHLIGHT_STOP,
+                )
+            )
+            .values_list("id", "snippet")
+        )
+
+
+class SubstringBackend:
+    """Unranked case-insensitive fallback for databases without a full-text index."""
+
+    def __init__(self, query, filters):
+        words = WORD_RE.findall(query)
+        self.pattern = re.compile("|".join(map(re.escape, words)), re.IGNORECASE) if words else None
+        self.matches = Quote.objects.filter(text__icontains=query.strip(), **filters).order_by(
+            "source_id", "start_time", "id"
+        )
+
+    def count(self):
+        return self.matches.count()
+
+    def count_up_to(self, cap):
+        return self.matches[:cap].count()
+
+    def mark(self, text):
+        if not self.pattern:
+            return text
+        return self.pattern.sub(lambda m: f"{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_STOP}", text)
+
+    def page(self, offset, limit):
+        end = offset + limit
+        return [(pk, self.mark(text)) for pk, text in self.matches.values_list("id", "text")[offset:end]]
+
+    def seek(self, after, limit, backwards=False):
+        """Keyset page on (source_id, start_time, id), the playback order."""
+        matches = self.matches
+        if after is not None:
+            source_id, start_time, pk = after
+            lookup = "lt" if backwards else "gt"
+            matches = matches.filter(
+                Q(**{f"source_id__{lookup}": source_id})
+                | Q(source_id=source_id, **{f"start_time__{lookup}": start_time})
+                | Q(source_id=source_id, start_time=start_time, **{f"id__{lookup}": pk})
+            )
+        if backwards:
+            matches = matches.reverse()
+        rows = list(matches.values_list("id", "text", "source_id", "start_time")[:limit])
+        if backwards:
+            rows.reverse()
+        return [(pk, self.mark(text), (source_id, start_time, pk)) for pk, text, source_id, start_time in rows]
+
+
+class QuoteIndexBackend:
+    """
+    Memory-mapped inverted index (see quote_index.py), no database query until the page is rendered.
+    Words are AND-ed, OR separates alternatives and "double quotes" match a phrase.
+    """
+
+    def __init__(self, query, filters):
+        self.matches = get_quote_index().match(
+            query, source_id=filters.get("source_id"), episode_ids=filters.get("episode_id__in")
+        )
+        words = {term for group in parse_query(query) for item in group for term in item}
+        self.pattern = re.compile(rf"\b({'|'.join(map(re.escape, words))})\b", re.IGNORECASE) if words else None
+
+    def count(self):
+        return len(self.matches)
+
+    def count_up_to(self, cap):
+        return min(len(self.matches), cap)
+
+    def page(self, offset, limit):
+        ranked = self.matches.top(offset + limit)[offset:]
+        return self.rows([quote_id for quote_id, _ in ranked])
+
+    def seek(self, after, limit, backwards=False):
+        """Keyset page on (-score, id); only the page's rows are ranked."""
+        ranked = self.matches.top(limit, after, backwards)
+        rows = self.rows([quote_id for quote_id, _ in ranked])
+        return [(quote_id, text, (-score, quote_id)) for (quote_id, text), (_, score) in zip(rows, ranked)]
+
+    def rows(self, ids):
+        texts = dict(Quote.objects.filter(id__in=ids).values_list("id", "text"))
+        rows = []
+        for quote_id in ids:
+            text = texts.get(quote_id, "")
+            if self.pattern:
+                text = self.pattern.sub(lambda m: f"{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_STOP}", text)
+            rows.append((quote_id, text))
+        return rows
+
+
+def get_backend():
+    # The mmap index is opt-in (QUOTE_INDEX_PATH) and takes over once it has been built
+    if get_quote_index() is not None:
+        return QuoteIndexBackend
+    if connection.vendor == "postgresql":
+        return PostgresBackend
+    if connection.vendor == "sqlite" and SQLITE_FTS_TABLE in connection.introspection.table_names():
+        return SQLiteBackend
+    return SubstringBackend
+
+
+class SearchResults:
+    """
+    Ranked search results that behave like a sequence for Paginator: count() and slicing
+    run in the database, and quotes plus snippets are only loaded for the requested slice.
+    Each returned Quote has a `snippet` attribute with the matched words wrapped in <mark>.
+    """
+
+    ordered = True
+
+    def __init__(self, query, **filters):
+        self.query = query
+        self.backend = get_backend()(query, filters)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[slice(key, key + 1)][0]
+
+        start, stop, _ = key.indices(self.count())
+        return self.load(self.backend.page(start, max(stop - start, 0)))
+
+    def count_up_to(self, cap):
+        """min(count, cap) without counting every match; exact when below `cap`."""
+        if self._count is not None:
+            return min(self._count, cap)
+        return self.backend.count_up_to(cap)
+
+    def seek(self, after=None, limit=20, backwards=False):
+        """
+        Keyset slice: up to `limit` quotes sorting right after (or, with `backwards`, right before) the
+        sort key `after`, in result order, each with a `sort_key` to continue from. Costs the same at any depth.
+        """
+        rows = self.backend.seek(after, limit, backwards)
+        quotes = self.load([(pk, snippet) for pk, snippet, _ in rows])
+        keys = {pk: key for pk, _, key in rows}
+        for quote in quotes:
+            quote.sort_key = list(keys[quote.pk])
+        return quotes
+
+    def load(self, rows):
+        quotes = Quote.objects.select_related("source", "episode").in_bulk([pk for pk, _ in rows])
+
+        results = []
+        for pk, snippet in rows:
+            if pk in quotes:
+                quote = quotes[pk]
+                quote.snippet = highlight(snippet)
+                results.append(quote)
+        return results
+
+
+def search_quotes(query, source_id=None, episode_ids=None):
+    """Full-text search over quote text, optionally limited to one source and/or some of its episodes."""
+    filters = {}
+    if source_id is not None:
+        filters["source_id"] = source_id
+    if episode_ids is not None:
+        filters["episode_id__in"] = list(episode_ids)
+    return SearchResults(query, **filters)
+
+
+def highlight_spans(text, query):
+    """
+    [start, end] character ranges of `text` matching the query's words, for clients that render their own markup.
+    Word endings are included so stemmed matches ("run" finding "running") are marked too.
+    """
+    words = sorted(set(WORD_RE.findall(query.lower())), key=len, reverse=True)
+    if not words:
+        return []
+    pattern = re.compile(rf"\b(?:{'|'.join(map(re.escape, words))})\w*", re.IGNORECASE)
+    return [[match.start(), match.end()] for match in pattern.finditer(text)]
@@ -0,0 +1,130 @@
+"""
+Byte-range file responses for the video player.
+
+Partial content is sent as a FileResponse over a file positioned at the start of the range, so a
+WSGI server whose wsgi.file_wrapper uses sendfile (gunicorn does) copies it straight from the page
+cache to the socket. With VIDEO_SENDFILE_HEADER set, the web server sends the file instead.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+BLOCK_SIZE = 256 * 1024
+MAX_AGE = 60 * 60
+
+
+class RangeFile:
+    """
+    A file opened at `start` that reads no more than `length` bytes. fileno() exposes the file's
+    own descriptor, already at `start`, so a sendfile-based file wrapper sends exactly this range
+    (its length comes from Content-Length).
+    """
+
+    def __init__(self, path, start, length):
+        self.file = open(path, "rb")
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Inclusive (start, end) of a single `bytes=` range, or None when the header should be ignored
+    (malformed, or several ranges). Raises ValueError when the range lies outside the file.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+
+    # "bytes=-500" is the last 500 bytes
+    if not first:
+        if int(last) == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - int(last), 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def sendfile_response(path, content_type):
+    """Empty response telling nginx (X-Accel-Redirect) or Apache/lighttpd (X-Sendfile) to send the file."""
+    response = HttpResponse(content_type=content_type)
+    header = settings.VIDEO_SENDFILE_HEADER
+    if header == "X-Accel-Redirect":
+        relative = os.path.relpath(path, settings.MEDIA_ROOT)
+        response[header] = quote(settings.VIDEO_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative)
+    else:
+        response[header] = path
+    return response
+
+
+def serve_file(request, path):
+    """
+    Serve `path` with conditional GET, Range and If-Range support: 206 for one satisfiable range,
+    416 for an unsatisfiable one, 200 for the whole file otherwise.
+    """
+    stat = os.stat(path)
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = http_date(stat.st_mtime)
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    # 1. Unchanged files cost a 304
+    response = get_conditional_response(request, etag=etag, last_modified=stat.st_mtime)
+    if response is None and getattr(settings, "VIDEO_SENDFILE_HEADER", None):
+        # The web server handles Range itself
+        response = sendfile_response(path, content_type)
+
+    if response is None:
+        # 2. A range applies only if the client's copy (If-Range) is still current
+        byte_range = None
+        header = request.headers.get("Range")
+        if_range = request.headers.get("If-Range")
+        if header and (not if_range or if_range in (etag, last_modified)):
+            try:
+                byte_range = parse_range(header, stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{stat.st_size}"
+                return response
+
+        # 3. Partial or full body
+        start, end = byte_range or (0, stat.st_size - 1)
+        length = end - start + 1
+        response = FileResponse(RangeFile(path, start, length), content_type=content_type)
+        response.block_size = BLOCK_SIZE
+        response["Content-Length"] = length
+        if byte_range:
+            response.status_code = 206
+            response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = last_modified
+    patch_cache_control(response, public=True, max_age=MAX_AGE)
+    return response
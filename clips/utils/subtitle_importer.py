@@ -1,12 +1,47 @@
-import pysrt
+import glob
+import hashlib
+import os
+import re
+from collections import namedtuple
 
-from clips.models import Episode, Quote, Source
+from django.db import transaction
+from django.db.models import Q
 
+from clips.models import Episode, Quote, Source, SubtitleFile
+from clips.utils.quote_index import add_delta
+from clips.utils.subtitle_parser import SUBTITLE_EXTENSIONS, iter_cues, segment_subtitles
+from clips.utils.thumbnails import generate_quote_thumbnails, missing_thumbnails
+from clips.utils.watch_payload import invalidate_watch_payload
 
-def import_quotes_from_srt(source_id, srt_file_path, episode_id=None, min_length=30):
+DEFAULT_BATCH_SIZE = 500
+
+# Outcome of importing one subtitle file; `skipped` is True when the file was unchanged
+ImportResult = namedtuple("ImportResult", ["created", "updated", "deleted", "unchanged", "skipped"])
+
+# Matches "S01E02", "s1e2", "S01.E02", "S01 E02" ...
+EPISODE_KEY_RE = re.compile(r"[Ss](\d{1,2})[ ._-]?[Ee](\d{1,3})")
+
+
+def import_quotes_from_srt(
+    source_id,
+    srt_file_path,
+    episode_id=None,
+    min_length=30,
+    bulk=True,
+    batch_size=DEFAULT_BATCH_SIZE,
+    force=False,
+):
     """
-    Automatically import quotes from SRT subtitle file.
+    Automatically import quotes from a subtitle file (SRT, WebVTT or ASS).
     Supports both Movies (Source only) and TV Shows (Source + Episode).
+    Cues are streamed from disk, so memory use does not grow with the file size.
+
+    Re-importing is idempotent: an unchanged file (same content hash) is skipped
+    unless `force` is set, and a changed file only touches the quotes whose cues changed.
+
+    In bulk mode quotes are written with `bulk_create` in batches of `batch_size`,
+    inside a single transaction per file. Thumbnails are not generated here: they are
+    created on first request, or in batch afterwards with `generate_missing_thumbnails`.
     """
     source = Source.objects.get(id=source_id)
 
@@ -15,57 +50,255 @@ def import_quotes_from_srt(source_id, srt_file_path, episode_id=None, min_length
     if episode_id:
         episode = Episode.objects.get(id=episode_id)
 
-    subs = pysrt.open(srt_file_path)
+    content_hash = file_hash(srt_file_path)
+    if not force:
+        subtitle_file = find_unchanged_file(source, episode, srt_file_path, content_hash)
+        if subtitle_file:
+            return ImportResult(0, 0, 0, subtitle_file.quote_count, True)
 
-    quotes_created_count = 0
-    current_quote = []
-    start_time = None
-    last_sub_end = 0
+    segments = segment_subtitles(iter_cues(srt_file_path), min_length=min_length)
+    return sync_quotes(source, episode, srt_file_path, content_hash, segments, bulk=bulk, batch_size=batch_size)
 
-    for _, sub in enumerate(subs):
 
-        def to_sec(t):
-            return t.hours * 3600 + t.minutes * 60 + t.seconds + t.milliseconds / 1000
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-        sub_start = to_sec(sub.start)
-        sub_end = to_sec(sub.end)
-        text = sub.text_without_tags.replace("\n", " ").strip()
 
-        # Check gap between this sub and the last one
-        gap = sub_start - last_sub_end
+def find_unchanged_file(source, episode, path, content_hash):
+    """
+    Return the SubtitleFile for `path` if it was already imported with the same contents.
+    """
+    return SubtitleFile.objects.filter(
+        source=source, episode=episode, file_name=os.path.basename(path), content_hash=content_hash
+    ).first()
 
-        if not current_quote:
-            start_time = sub_start
-            current_quote.append(text)
-            last_sub_end = sub_end
-        elif gap < 1.5:  # If gap is small, keep building the same quote
-            current_quote.append(text)
-            last_sub_end = sub_end
+
+def sync_quotes(source, episode, path, content_hash, segments, bulk=True, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Bring the quotes of a subtitle file in line with freshly parsed segments.
+
+    A first import is streamed straight into `write_quotes`. On re-import existing quotes
+    are diffed against the segments (see `diff_quotes`): unchanged quotes are left alone,
+    edited ones are updated in place (keeping their ids, views and learning links),
+    and only new or removed cues cause inserts or deletes.
+    """
+    with transaction.atomic():
+        subtitle_file, _ = SubtitleFile.objects.get_or_create(
+            source=source,
+            episode=episode,
+            file_name=os.path.basename(path),
+            defaults={"content_hash": content_hash},
+        )
+
+        # Quotes imported before files were tracked are adopted by the first tracked import
+        existing = Quote.objects.filter(
+            Q(subtitle_file=subtitle_file) | Q(subtitle_file__isnull=True, source=source, episode=episode)
+        )
+        existing = list(existing.values_list("id", "start_time", "end_time", "text"))
+
+        if not existing:
+            created = write_quotes(
+                source, episode, segments, bulk=bulk, batch_size=batch_size, subtitle_file=subtitle_file
+            )
+            result = ImportResult(created, 0, 0, 0, False)
         else:
-            # Save the accumulated quote before starting a new one
-            full_text = " ".join(current_quote)
-            if len(full_text) >= min_length:
-                Quote.objects.create(
-                    source=source,
-                    episode=episode,  # This will be None for Movies
-                    text=full_text,
-                    start_time=start_time,
-                    end_time=last_sub_end,
-                )
-                quotes_created_count += 1
+            result = apply_diff(source, episode, subtitle_file, existing, list(segments), bulk, batch_size)
+
+        subtitle_file.content_hash = content_hash
+        subtitle_file.quote_count = result.created + result.updated + result.unchanged
+        subtitle_file.save()
+
+        previous_ids = {quote_id for quote_id, *_ in existing}
+        transaction.on_commit(lambda: update_quote_index(subtitle_file, previous_ids))
+
+    return result
+
+
+def update_quote_index(subtitle_file, previous_ids):
+    """Re-index a file's quotes in a delta segment of the search index (if enabled); removed ones are tombstoned."""
+    quotes = list(subtitle_file.quotes.values_list("id", "source_id", "episode_id", "text"))
+    add_delta(quotes, previous_ids - {quote_id for quote_id, *_ in quotes})
+    # Edited quotes can change the watch page's first chunk
+    invalidate_watch_payload(subtitle_file.source_id)
+
+
+def diff_quotes(existing, segments):
+    """
+    Match existing (id, start, end, text) quotes against new (start, end, text) segments.
+
+    Quotes are matched first on time window and text, then on time window alone
+    (text edited), then on text alone (timing shifted). Times are compared to the millisecond.
+    Returns (unchanged_ids, updates, creates, delete_ids) where updates are (id, start, end, text).
+    """
+
+    def window(start, end):
+        return round(start, 3), round(end, 3)
+
+    unmatched = {quote_id: (start, end, text) for quote_id, start, end, text in existing}
+    remaining = list(segments)
+    unchanged_ids = []
+    updates = []
+
+    def match(key_of_quote, key_of_segment, on_match):
+        nonlocal remaining
+        index = {}
+        for quote_id, quote in unmatched.items():
+            index.setdefault(key_of_quote(*quote), []).append(quote_id)
+        still_remaining = []
+        for segment in remaining:
+            candidates = index.get(key_of_segment(*segment))
+            if candidates:
+                quote_id = candidates.pop(0)
+                del unmatched[quote_id]
+                on_match(quote_id, segment)
+            else:
+                still_remaining.append(segment)
+        remaining = still_remaining
+
+    match(
+        lambda s, e, t: (window(s, e), t),
+        lambda s, e, t: (window(s, e), t),
+        lambda quote_id, segment: unchanged_ids.append(quote_id),
+    )
+    match(
+        lambda s, e, t: window(s, e),
+        lambda s, e, t: window(s, e),
+        lambda quote_id, segment: updates.append((quote_id, *segment)),
+    )
+    match(
+        lambda s, e, t: t,
+        lambda s, e, t: t,
+        lambda quote_id, segment: updates.append((quote_id, *segment)),
+    )
+
+    return unchanged_ids, updates, remaining, list(unmatched)
 
-            # Reset for new quote
-            current_quote = [text]
-            start_time = sub_start
-            last_sub_end = sub_end
 
-    # Save the final quote in the file
-    if current_quote:
-        full_text = " ".join(current_quote)
-        if len(full_text) >= min_length:
+def apply_diff(source, episode, subtitle_file, existing, segments, bulk, batch_size):
+    unchanged_ids, updates, creates, delete_ids = diff_quotes(existing, segments)
+    old_times = {quote_id: (start, end) for quote_id, start, end, _ in existing}
+
+    for start in range(0, len(delete_ids), batch_size):
+        end = start + batch_size
+        Quote.objects.filter(id__in=delete_ids[start:end]).delete()
+
+    edited = []
+    retimed = []
+    stale_clips = []
+    for quote_id, start_time, end_time, text in updates:
+        quote = Quote(id=quote_id, start_time=start_time, end_time=end_time, text=text, subtitle_file=subtitle_file)
+        old_start, old_end = old_times[quote_id]
+        # A quote that starts elsewhere shows a different frame, so its thumbnail is cleared for regeneration
+        if round(old_start, 3) != round(start_time, 3):
+            retimed.append(quote)
+        else:
+            edited.append(quote)
+        # Its clip was cut for the old timing
+        if (round(old_start, 3), round(old_end, 3)) != (round(start_time, 3), round(end_time, 3)):
+            stale_clips.append(quote_id)
+
+    fields = ["start_time", "end_time", "text", "subtitle_file"]
+    Quote.objects.bulk_update(edited, fields, batch_size=batch_size)
+    Quote.objects.bulk_update(
+        retimed, fields + ["thumbnail", "thumbnail_digest", "thumbnail_width"], batch_size=batch_size
+    )
+    for start in range(0, len(stale_clips), batch_size):
+        end = start + batch_size
+        Quote.objects.filter(id__in=stale_clips[start:end]).update(clip=None, clip_start=None)
+
+    # Adopted legacy quotes that did not change still need to be linked to the file
+    Quote.objects.filter(source=source, episode=episode, subtitle_file__isnull=True).update(
+        subtitle_file=subtitle_file
+    )
+
+    created = write_quotes(source, episode, creates, bulk=bulk, batch_size=batch_size, subtitle_file=subtitle_file)
+    return ImportResult(created, len(updates), len(delete_ids), len(unchanged_ids), False)
+
+
+def find_subtitle_files(path):
+    """
+    Resolve a file, a directory (searched recursively) or a glob pattern to a sorted list of subtitle files.
+    """
+    if os.path.isfile(path):
+        return [path]
+
+    if os.path.isdir(path):
+        found = []
+        for root, _, files in os.walk(path):
+            found.extend(os.path.join(root, name) for name in files if name.lower().endswith(SUBTITLE_EXTENSIONS))
+        return sorted(found)
+
+    return sorted(p for p in glob.glob(path, recursive=True) if os.path.isfile(p))
+
+
+def parse_episode_key(filename):
+    """
+    Extract (season, episode_number) from a filename like "Friends.S01E02.srt".
+    Returns None when the name has no SxxEyy marker.
+    """
+    match = EPISODE_KEY_RE.search(os.path.basename(filename))
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def write_quotes(source, episode, segments, bulk=True, batch_size=DEFAULT_BATCH_SIZE, subtitle_file=None):
+    """
+    Insert (start_time, end_time, text) segments as quotes of `source` / `episode`.
+    In bulk mode everything is written in one transaction; returns the number of quotes created.
+    """
+    if not bulk:
+        quotes_created_count = 0
+        for start_time, end_time, text in segments:
             Quote.objects.create(
-                source=source, episode=episode, text=full_text, start_time=start_time, end_time=last_sub_end
+                source=source,
+                episode=episode,  # This will be None for Movies
+                subtitle_file=subtitle_file,
+                text=text,
+                start_time=start_time,
+                end_time=end_time,
             )
             quotes_created_count += 1
+        return quotes_created_count
+
+    quotes_created_count = 0
+    batch = []
+
+    with transaction.atomic():
+        for start_time, end_time, text in segments:
+            batch.append(
+                Quote(
+                    source=source,
+                    episode=episode,
+                    subtitle_file=subtitle_file,
+                    text=text,
+                    start_time=start_time,
+                    end_time=end_time,
+                )
+            )
+            if len(batch) >= batch_size:
+                Quote.objects.bulk_create(batch)
+                quotes_created_count += len(batch)
+                batch = []
+
+        if batch:
+            Quote.objects.bulk_create(batch)
+            quotes_created_count += len(batch)
 
     return quotes_created_count
+
+
+def generate_missing_thumbnails(source_id, episode_id=None):
+    """
+    Generate thumbnails for imported quotes that do not have one yet.
+    Meant to run after a bulk import, outside of the import transaction.
+    Frames are extracted in batches, one ffmpeg run per video (see `clips.utils.thumbnails`).
+    """
+    quotes = missing_thumbnails().filter(source_id=source_id)
+    if episode_id:
+        quotes = quotes.filter(episode_id=episode_id)
+    return generate_quote_thumbnails(quotes)
@@ -0,0 +1,192 @@
+import html
+import os
+import re
+
+SRT_EXTENSIONS = (".srt",)
+VTT_EXTENSIONS = (".vtt",)
+ASS_EXTENSIONS = (".ass", ".ssa")
+SUBTITLE_EXTENSIONS = SRT_EXTENSIONS + VTT_EXTENSIONS + ASS_EXTENSIONS
+
+# "00:01:02,345 --> 00:01:04,000" (SRT) and "01:02.345 --> 01:04.000 align:start" (WebVTT, hours optional)
+TIMING_RE = re.compile(
+    r"(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{1,2})[,.](\d{1,3})"
+)
+# "0:01:02.34" (ASS, centiseconds)
+ASS_TIME_RE = re.compile(r"(\d+):(\d{1,2}):(\d{1,2})[.](\d{1,3})")
+# HTML-like tags (<i>, <font ...>, <v Speaker>) and ASS override blocks ({\an8})
+TAG_RE = re.compile(r"<[^>]*>|\{[^}]*\}")
+ASS_BREAK_RE = re.compile(r"\\[Nnh]")
+
+
+def iter_cues(path, encoding="utf-8-sig"):
+    """
+    Stream (start, end, text) tuples from a subtitle file, one cue at a time.
+    The format is picked from the extension: SRT, WebVTT or ASS/SSA.
+    Times are in seconds, text has tags stripped and line breaks joined with spaces.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ASS_EXTENSIONS:
+        parser = iter_ass_cues
+    elif ext in VTT_EXTENSIONS:
+        parser = iter_vtt_cues
+    else:
+        parser = iter_srt_cues
+
+    with open(path, encoding=encoding, errors="replace") as f:
+        yield from parser(f)
+
+
+def to_seconds(hours, minutes, seconds, fraction):
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(fraction) / 10 ** len(fraction)
+
+
+def clean_text(lines):
+    return TAG_RE.sub("", " ".join(lines)).strip()
+
+
+def iter_srt_cues(lines):
+    """
+    Parse SRT (and WebVTT cue blocks) from an iterable of lines.
+    Cue numbers are ignored, so concatenated or renumbered files parse fine.
+    """
+    start = end = None
+    text = []
+
+    for line in lines:
+        line = line.strip()
+
+        if "-->" in line:
+            match = TIMING_RE.search(line)
+            if match:
+                if start is not None:
+                    # Previous cue was not closed by a blank line; its last line is the next cue number
+                    if text and text[-1].isdigit():
+                        text.pop()
+                    yield start, end, clean_text(text)
+                g = match.groups()
+                start = to_seconds(*g[:4])
+                end = to_seconds(*g[4:])
+                text = []
+                continue
+
+        if not line:
+            if start is not None:
+                yield start, end, clean_text(text)
+                start = None
+                text = []
+        elif start is not None:
+            text.append(line)
+
+    if start is not None:
+        yield start, end, clean_text(text)
+
+
+def iter_vtt_cues(lines):
+    """
+    Parse WebVTT: skips the header, NOTE/STYLE/REGION blocks and cue settings,
+    then decodes HTML entities in cue text.
+    """
+    in_cue = False
+    skipping = False
+
+    def cue_lines():
+        nonlocal in_cue, skipping
+        for line in lines:
+            stripped = line.strip()
+            if not stripped:
+                in_cue = skipping = False
+                yield line
+            elif skipping:
+                continue
+            elif not in_cue and stripped.startswith(("WEBVTT", "NOTE", "STYLE", "REGION")):
+                skipping = True
+            else:
+                in_cue = True
+                yield line
+
+    for start, end, text in iter_srt_cues(cue_lines()):
+        yield start, end, html.unescape(text)
+
+
+def iter_ass_cues(lines):
+    """
+    Parse the [Events] section of an ASS/SSA file.
+    Dialogue lines are yielded in file order, which is start-time order for virtually all real files.
+    """
+    in_events = False
+    fields = None
+
+    for line in lines:
+        line = line.strip()
+
+        if line.startswith("["):
+            in_events = line.lower() == "[events]"
+            continue
+        if not in_events:
+            continue
+
+        if line.startswith("Format:"):
+            fields = [name.strip().lower() for name in line.partition(":")[2].split(",")]
+            continue
+        if not line.startswith("Dialogue:") or not fields:
+            continue
+
+        values = line.partition(":")[2].split(",", len(fields) - 1)
+        if len(values) != len(fields):
+            continue
+        event = dict(zip(fields, values))
+
+        start_match = ASS_TIME_RE.match(event.get("start", "").strip())
+        end_match = ASS_TIME_RE.match(event.get("end", "").strip())
+        if not start_match or not end_match:
+            continue
+
+        text = ASS_BREAK_RE.sub(" ", event.get("text", ""))
+        yield to_seconds(*start_match.groups()), to_seconds(*end_match.groups()), " ".join(clean_text([text]).split())
+
+
+def segment_subtitles(cues, min_length=30, max_gap=1.5):
+    """
+    Merge consecutive (start, end, text) cues into quotes.
+    Yields (start_time, end_time, text) for every quote that is at least `min_length` characters long.
+    """
+    current_quote = []
+    start_time = None
+    last_sub_end = 0
+
+    for sub_start, sub_end, text in cues:
+        # Check gap between this sub and the last one
+        gap = sub_start - last_sub_end
+
+        if not current_quote:
+            start_time = sub_start
+            current_quote.append(text)
+            last_sub_end = sub_end
+        elif gap < max_gap:  # If gap is small, keep building the same quote
+            current_quote.append(text)
+            last_sub_end = sub_end
+        else:
+            # Emit the accumulated quote before starting a new one
+            full_text = " ".join(current_quote)
+            if len(full_text) >= min_length:
+                yield start_time, last_sub_end, full_text
+
+            # Reset for new quote
+            current_quote = [text]
+            start_time = sub_start
+            last_sub_end = sub_end
+
+    # Emit the final quote in the file
+    if current_quote:
+        full_text = " ".join(current_quote)
+        if len(full_text) >= min_length:
+            yield start_time, last_sub_end, full_text
+
+
+def parse_subtitle_file(srt_file_path, min_length=30):
+    """
+    Parse and segment a subtitle file; returns a list of (start_time, end_time, text).
+    This module doesn't import Django, so it runs in worker processes started with spawn or
+    forkserver, where the app registry isn't set up.
+    """
+    return list(segment_subtitles(iter_cues(srt_file_path), min_length=min_length))
@@ -0,0 +1,67 @@
+import random
+
+WORDS = (
+    "the you what this know just like right there well here really think about going come want "
+    "never always something nothing everyone somebody tonight tomorrow listen look wait stop "
+    "please sorry thanks okay yeah maybe house money time night people world life father mother"
+).split()
+
+# Pause between cues, in seconds. The importer merges cues closer than 1.5s,
+# so the distribution decides how many quotes a file segments into.
+GAP_DISTRIBUTIONS = {
+    "tight": lambda rng: rng.uniform(0.05, 0.5),
+    "uniform": lambda rng: rng.uniform(0.05, 3.0),
+    "bursty": lambda rng: rng.expovariate(1.0),
+}
+
+
+def format_timestamp(seconds, separator):
+    millis = round(seconds * 1000)
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def random_line(rng, text_length):
+    words = []
+    length = 0
+    while length < text_length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words).capitalize() + rng.choice(".?!")
+
+
+def iter_synthetic_cues(cues, gap="uniform", text_length=40, seed=0):
+    """
+    Yield `cues` (start, end, text) tuples with gaps drawn from `gap` (see GAP_DISTRIBUTIONS)
+    and text of roughly `text_length` characters, split over two lines when long.
+    The same seed always produces the same file.
+    """
+    rng = random.Random(seed)
+    next_gap = GAP_DISTRIBUTIONS[gap]
+    start = 1.0
+
+    for _ in range(cues):
+        end = start + rng.uniform(1.0, 4.0)
+        text = random_line(rng, max(1, round(rng.gauss(text_length, text_length / 4))))
+        cut = text.find(" ", len(text) // 2)
+        if len(text) > 42 and cut > 0:
+            text = text[:cut] + "\n" + text[cut:].lstrip()
+        yield start, end, text
+        start = end + next_gap(rng)
+
+
+def write_synthetic_subtitles(path, cues, fmt="srt", gap="uniform", text_length=40, seed=0):
+    """Write a synthetic SRT or WebVTT file to `path`. Returns the path."""
+    separator = "." if fmt == "vtt" else ","
+
+    with open(path, "w", encoding="utf-8") as f:
+        if fmt == "vtt":
+            f.write("WEBVTT\n\n")
+        for index, (start, end, text) in enumerate(iter_synthetic_cues(cues, gap, text_length, seed), start=1):
+            f.write(f"{index}\n{format_timestamp(start, separator)} --> {format_timestamp(end, separator)}\n")
+            f.write(f"{text}\n\n")
+
+    return path
@@ -0,0 +1,118 @@
+import logging
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from clips.models import Quote
+from clips.utils.derivatives import build_derivatives
+from clips.utils.video_batches import group_by_video, run_in_batches, video_quotes
+
+logger = logging.getLogger(__name__)
+
+# Inputs opened by one ffmpeg process; every input is a separate seek into the same file
+FRAMES_PER_RUN = 50
+
+# On-demand generation: a quote is claimed in the database, so only one request per quote starts ffmpeg
+# across all worker processes and hosts. A claim older than this may be taken again.
+LOCK_TIMEOUT = 300
+executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnails")
+
+PLACEHOLDER_SVG = (
+    b'<svg xmlns="http://www.w3.org/2000/svg" width="320" height="180" viewBox="0 0 320 180">'
+    b'<rect width="320" height="180" fill="#1a1a1a"/>'
+    b'<text x="160" y="100" font-size="40" text-anchor="middle">\xf0\x9f\x8e\xac</text></svg>'
+)
+
+
+def extract_frames(video_path, timestamps, output_dir):
+    """
+    Extract one JPEG per timestamp using one ffmpeg process per `FRAMES_PER_RUN` frames.
+    Each frame is a fast input seek (-ss before -i), and timestamps are sorted
+    so the file is read front to back. Returns output paths in the order of `timestamps`.
+    """
+    order = sorted(range(len(timestamps)), key=lambda i: timestamps[i])
+    paths = [os.path.join(output_dir, f"frame_{i}.jpg") for i in range(len(timestamps))]
+    frames = [(timestamps[i], paths[i]) for i in order]
+    run_in_batches(lambda batch: run_ffmpeg(video_path, batch), frames, FRAMES_PER_RUN)
+    return paths
+
+
+def run_ffmpeg(video_path, frames):
+    command = ["ffmpeg", "-v", "error", "-y"]
+    for timestamp, _ in frames:
+        command += ["-ss", f"{timestamp:.3f}", "-i", video_path]
+    for input_index, (_, output_path) in enumerate(frames):
+        command += ["-map", f"{input_index}:v:0", "-frames:v", "1", "-q:v", "2", output_path]
+    subprocess.run(command, check=True, capture_output=True)
+
+
+def generate_quote_thumbnails(quotes):
+    """
+    Write thumbnails for `quotes`, extracting all frames of the same video in a batch.
+    Returns the number of thumbnails generated.
+    """
+    generated = []
+    for video_path, group in group_by_video(quotes):
+        with tempfile.TemporaryDirectory(prefix="thumbs_") as tmp_dir:
+            frames = extract_frames(video_path, [q.start_time for q in group], tmp_dir)
+            for quote, frame in zip(group, frames):
+                if not os.path.exists(frame):
+                    # Seeking past the end of the stream produces no frame
+                    continue
+                with open(frame, "rb") as f:
+                    quote.thumbnail.save(f"quote_{quote.id}.jpg", File(f), save=False)
+                quote.thumbnail_digest, quote.thumbnail_width = build_derivatives(quote.thumbnail)
+                generated.append(quote)
+
+    Quote.objects.bulk_update(generated, ["thumbnail", "thumbnail_digest", "thumbnail_width"], batch_size=500)
+    return len(generated)
+
+
+def missing_thumbnails():
+    return Quote.objects.filter(Q(thumbnail="") | Q(thumbnail__isnull=True)).select_related("source", "episode")
+
+
+def generate_video_thumbnails(video, overwrite=False):
+    """
+    Generate thumbnails for every quote of an Episode, or of a Source (all its episodes for a TV show).
+    Only quotes without a thumbnail are processed unless `overwrite` is set.
+    """
+    quotes = missing_thumbnails() if not overwrite else Quote.objects.select_related("source", "episode")
+    return generate_quote_thumbnails(video_quotes(video, quotes))
+
+
+def request_thumbnail(quote_id):
+    """
+    Schedule background generation of a quote thumbnail.
+    Returns False if generation for this quote is already running (or failed recently).
+    The claim is a conditional UPDATE, atomic in the database. It is left to expire rather than released,
+    which also backs off quotes whose frame cannot be extracted.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=LOCK_TIMEOUT)
+    claimed = (
+        Quote.objects.filter(pk=quote_id)
+        .filter(Q(thumbnail_requested_at__isnull=True) | Q(thumbnail_requested_at__lt=expired))
+        .update(thumbnail_requested_at=now)
+    )
+    if not claimed:
+        return False
+    executor.submit(generate_in_background, quote_id)
+    return True
+
+
+def generate_in_background(quote_id):
+    try:
+        generate_quote_thumbnails(missing_thumbnails().filter(pk=quote_id))
+    except Exception:
+        logger.exception("Thumbnail generation failed for quote %s", quote_id)
+    finally:
+        # Worker threads get their own connection; don't leak it
+        connection.close()
@@ -0,0 +1,167 @@
+import re
+import threading
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from clips.models import Source
+
+# Same cut-offs as pg_trgm's defaults for % (similarity) and <% (word similarity)
+SIMILARITY_THRESHOLD = 0.3
+WORD_SIMILARITY_THRESHOLD = 0.6
+WORD_RE = re.compile(r"\w+")
+
+# Bumped on every Source change so each process knows when its in-memory index is stale.
+# Needs a shared cache (Redis, Memcached) to reach other worker processes.
+INDEX_VERSION_KEY = "title-trigram-index-version"
+
+
+def trigrams(text):
+    """pg_trgm style trigrams: lowercased words, each padded with two spaces in front and one behind."""
+    grams = set()
+    for word in WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update("".join(gram) for gram in zip(padded, padded[1:], padded[2:]))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigram to Source ids, kept in memory.
+    Only titles sharing at least one trigram with the query are scored.
+    """
+
+    def __init__(self, sources=()):
+        self.postings = defaultdict(set)
+        self.entries = {}
+        for source in sources:
+            self.add(source)
+
+    def add(self, source):
+        self.remove(source.pk)
+        grams = trigrams(source.title)
+        self.entries[source.pk] = (source.title.lower(), (source.slug or "").lower(), len(grams))
+        for gram in grams:
+            self.postings[gram].add(source.pk)
+
+    def remove(self, source_id):
+        entry = self.entries.pop(source_id, None)
+        if entry is None:
+            return
+        for gram in trigrams(entry[0]):
+            self.postings[gram].discard(source_id)
+
+    def search(self, query, limit):
+        """Return [(source_id, score)] best first; substring matches rank above fuzzy ones."""
+        needle = query.lower()
+        query_grams = trigrams(query)
+
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.postings.get(gram, ()))
+
+        # Too short to have useful trigrams: a plain scan keeps the old icontains behaviour
+        if len(needle) < 3:
+            candidates = [pk for pk, (title, slug, _) in self.entries.items() if needle in title or needle in slug]
+        else:
+            candidates = shared.keys()
+
+        scored = []
+        for source_id in candidates:
+            title, slug, title_size = self.entries[source_id]
+            common = shared.get(source_id, 0)
+            similarity = common / (len(query_grams) + title_size - common) if common else 0.0
+            # Share of the query's trigrams found anywhere in the title (pg_trgm's word_similarity, minus word order)
+            word_similarity = common / len(query_grams) if query_grams else 0.0
+            is_substring = needle in title or needle in slug
+
+            if is_substring or similarity >= SIMILARITY_THRESHOLD or word_similarity >= WORD_SIMILARITY_THRESHOLD:
+                # Closer overall length breaks ties between titles that contain the same words
+                scored.append((source_id, is_substring + max(similarity, word_similarity), similarity))
+
+        scored.sort(key=lambda item: (item[1], item[2]), reverse=True)
+        return [(source_id, score) for source_id, score, _ in scored[:limit]]
+
+
+_index = None
+_index_version = None
+_lock = threading.Lock()
+
+
+def current_index():
+    """This process's index, rebuilt from the database when another process changed a Source. Call with _lock held."""
+    global _index, _index_version
+
+    version = cache.get(INDEX_VERSION_KEY, 0)
+    if _index is None or _index_version != version:
+        _index = TrigramIndex(Source.objects.only("id", "title", "slug"))
+        _index_version = version
+    return _index
+
+
+def bump_version():
+    try:
+        return cache.incr(INDEX_VERSION_KEY)
+    except ValueError:
+        cache.set(INDEX_VERSION_KEY, 1, None)
+        return 1
+
+
+def index_source(sender, instance, **kwargs):
+    """post_save handler: patch this process's index and mark the others stale."""
+    global _index_version
+
+    with _lock:
+        version = bump_version()
+        if _index is not None:
+            _index.add(instance)
+            # Only stays current if no other process changed a Source since this index was built
+            if _index_version == version - 1:
+                _index_version = version
+
+
+def unindex_source(sender, instance, **kwargs):
+    """post_delete handler."""
+    global _index_version
+
+    with _lock:
+        version = bump_version()
+        if _index is not None:
+            _index.remove(instance.pk)
+            # Only stays current if no other process changed a Source since this index was built
+            if _index_version == version - 1:
+                _index_version = version
+
+
+def search_titles(query, limit=12):
+    """Sources whose title is similar to `query` (typos included), most similar first."""
+    query = query.strip()
+    if connection.vendor == "postgresql":
+        return search_titles_postgres(query, limit)
+
+    with _lock:
+        ranked = current_index().search(query, limit)
+    sources = Source.objects.in_bulk([source_id for source_id, _ in ranked])
+    return [sources[source_id] for source_id, _ in ranked if source_id in sources]
+
+
+def search_titles_postgres(query, limit):
+    # %, <% and ILIKE can all be answered from the gin_trgm_ops index
+    matches = RawSQL(
+        "clips_source.title %% %s OR %s <%% clips_source.title OR clips_source.title ILIKE %s",
+        [query, query, f"%{connection.ops.prep_for_like_query(query)}%"],
+        output_field=BooleanField(),
+    )
+    score = RawSQL(
+        "GREATEST(similarity(clips_source.title, %s), word_similarity(%s, clips_source.title))",
+        [query, query],
+        output_field=FloatField(),
+    )
+    return list(
+        Source.objects.filter(Q(matches) | Q(slug__icontains=query))
+        .annotate(score=score)
+        .order_by("-score", "title")[:limit]
+    )
@@ -0,0 +1,55 @@
+"""
+Shared plumbing for jobs that cut something out of the videos for many quotes at once (thumbnails,
+clips): quotes are grouped per video file, and each video is processed by a few ffmpeg runs with
+many inputs rather than one process per quote.
+"""
+
+import subprocess
+from itertools import groupby
+
+from clips.models import Episode
+
+
+def quote_video_path(quote):
+    """Path of the video a quote plays from: its episode's file, or the movie file."""
+    if quote.episode_id:
+        return quote.episode.video_file.path if quote.episode.video_file else None
+    return quote.source.video_file.path if quote.source.video_file else None
+
+
+def video_quotes(video, quotes):
+    """
+    `quotes` narrowed to those of an Episode or a Source. A Source without a video of its own
+    (a TV show) stands for all of its episodes.
+    """
+    if isinstance(video, Episode):
+        return quotes.filter(episode=video)
+    if video.video_file:
+        return quotes.filter(source=video, episode__isnull=True)
+    return quotes.filter(source=video, episode__isnull=False)
+
+
+def group_by_video(quotes):
+    """Yield (video_path, quotes) per video file, each group in playback order; quotes without a video are left out."""
+    quotes = [q for q in quotes if quote_video_path(q)]
+    quotes.sort(key=lambda q: (quote_video_path(q), q.start_time))
+    for video_path, group in groupby(quotes, key=quote_video_path):
+        yield video_path, list(group)
+
+
+def run_in_batches(run, jobs, batch_size):
+    """
+    Call `run` with `batch_size` jobs at a time. One bad job (e.g. a seek past the end) fails the
+    whole ffmpeg run, so a failed batch is retried job by job and the jobs that still fail are skipped.
+    """
+    for start in range(0, len(jobs), batch_size):
+        end = start + batch_size
+        batch = jobs[start:end]
+        try:
+            run(batch)
+        except subprocess.CalledProcessError:
+            for job in batch:
+                try:
+                    run([job])
+                except subprocess.CalledProcessError:
+                    continue
@@ -1,19 +0,0 @@
-import subprocess
-
-
-def get_video_duration(video_path):
-    """
-    Get video duration in seconds using ffprobe
-    """
-    command = [
-        "ffprobe",
-        "-v",
-        "error",
-        "-show_entries",
-        "format=duration",
-        "-of",
-        "default=noprint_wrappers=1:nokey=1",
-        video_path,
-    ]
-    result = subprocess.run(command, capture_output=True, text=True, check=True)
-    return float(result.stdout.strip())
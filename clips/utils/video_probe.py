@@ -0,0 +1,83 @@
+import json
+import subprocess
+
+# Keyframe spacing is measured on the first minute of the video; enough to see the GOP pattern
+KEYFRAME_SAMPLE_SECONDS = 60
+
+
+def probe_metadata(video_path):
+    """
+    Read duration, resolution, codecs, bitrate and keyframe interval with ffprobe.
+    Does not touch the database, so it is safe to call from worker threads.
+    """
+    command = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        video_path,
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    data = json.loads(result.stdout or "{}")
+
+    fmt = data.get("format", {})
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+
+    return {
+        "duration": to_float(fmt.get("duration")),
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "video_codec": video.get("codec_name", ""),
+        "audio_codec": audio.get("codec_name", ""),
+        "bitrate": to_int(fmt.get("bit_rate")),
+        "keyframe_interval": probe_keyframe_interval(video_path) if video else None,
+    }
+
+
+def probe_keyframe_interval(video_path):
+    """
+    Average seconds between keyframes, measured over the first KEYFRAME_SAMPLE_SECONDS.
+    """
+    keyframes = probe_keyframes(video_path, KEYFRAME_SAMPLE_SECONDS)
+    if len(keyframes) < 2:
+        return None
+    return (keyframes[-1] - keyframes[0]) / (len(keyframes) - 1)
+
+
+def probe_keyframes(video_path, seconds=None):
+    """
+    Sorted keyframe timestamps of the first video stream (of its first `seconds`, if given),
+    read from packet flags (no decoding needed).
+    """
+    command = ["ffprobe", "-v", "error", "-select_streams", "v:0"]
+    if seconds:
+        command += ["-read_intervals", f"%+{seconds}"]
+    command += ["-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        timestamp = to_float(pts_time)
+        if "K" in flags and timestamp is not None:
+            keyframes.append(timestamp)
+    return sorted(keyframes)
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
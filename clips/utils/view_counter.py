@@ -0,0 +1,88 @@
+"""
+Buffered quote view counts. Requests only add to an in-process counter; a background thread writes
+the totals every VIEW_FLUSH_INTERVAL seconds (sooner once VIEW_BUFFER_SIZE quotes are waiting) as
+`views = views + n` UPDATEs, one per distinct n. Reads never write, a popular quote costs one row
+update per flush instead of one per view, and concurrent increments can't overwrite each other.
+Each worker process keeps its own buffer; what is buffered when a process exits is flushed at exit.
+"""
+
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from clips.models import Quote
+
+logger = logging.getLogger(__name__)
+
+# Ids per UPDATE ... WHERE id IN (...)
+FLUSH_BATCH_SIZE = 500
+
+_counts = Counter()
+_lock = threading.Lock()
+_wake = threading.Event()
+_flusher = None
+
+
+def record_view(quote_id):
+    """Count one view of `quote_id`; it reaches the database with the next flush."""
+    with _lock:
+        _counts[quote_id] += 1
+        full = len(_counts) >= settings.VIEW_BUFFER_SIZE
+    start_flusher()
+    if full:
+        _wake.set()
+
+
+def flush_views():
+    """Write the buffered counts. Returns the number of views written; on failure they stay buffered."""
+    with _lock:
+        counts = dict(_counts)
+        _counts.clear()
+    if not counts:
+        return 0
+
+    # Quotes viewed the same number of times share an UPDATE
+    by_increment = defaultdict(list)
+    for quote_id, count in counts.items():
+        by_increment[count].append(quote_id)
+
+    try:
+        with transaction.atomic():
+            for count, quote_ids in by_increment.items():
+                for start in range(0, len(quote_ids), FLUSH_BATCH_SIZE):
+                    end = start + FLUSH_BATCH_SIZE
+                    Quote.objects.filter(id__in=quote_ids[start:end]).update(views=F("views") + count)
+    except Exception:
+        logger.exception("Flushing %d quote view counts failed", len(counts))
+        with _lock:
+            _counts.update(counts)
+        return 0
+    return sum(counts.values())
+
+
+def run_flusher():
+    while True:
+        _wake.wait(settings.VIEW_FLUSH_INTERVAL)
+        _wake.clear()
+        try:
+            flush_views()
+        finally:
+            connection.close()
+
+
+def start_flusher():
+    """Start the flush thread on first use, so only processes that serve views run one."""
+    global _flusher
+    if _flusher is not None:
+        return
+    with _lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(target=run_flusher, name="view-counter", daemon=True)
+        _flusher.start()
+    atexit.register(flush_views)
@@ -0,0 +1,207 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+
+from clips.models import Source, SourceStats
+from clips.utils.pagination import encode_cursor
+from clips.utils.search import highlight_spans
+
+logger = logging.getLogger(__name__)
+
+# Quotes per chunk of the watch page's quote list
+CHUNK_SIZE = 100
+# Payloads are rebuilt on change, so the timeout only bounds memory for sources nobody watches
+PAYLOAD_TIMEOUT = 24 * 60 * 60
+PAYLOAD_VERSION = 5
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="watch-payload")
+# Sources with a rebuild queued; an import sends many invalidations but needs one rebuild
+_pending = set()
+_lock = threading.Lock()
+
+# Keep "</script>" and friends from closing the inline <script> the JSON is embedded in
+JSON_SCRIPT_ESCAPES = {ord("<"): "\\u003C", ord(">"): "\\u003E", ord("&"): "\\u0026"}
+
+
+def script_json(data):
+    return json.dumps(data).translate(JSON_SCRIPT_ESCAPES)
+
+
+def video_streams(source):
+    """
+    {episode id (None for the movie): (url, HlsPackage or None)} for every video of `source`:
+    the HLS master playlist where the video has been packaged, the MP4 stream otherwise.
+    """
+    streams = {}
+    if source.video_file:
+        streams[None] = (source.stream_url, source.hls)
+    for ep in source.episodes.exclude(video_file="").select_related("hls_package"):
+        if ep.video_file:
+            streams[ep.id] = (ep.stream_url, ep.hls)
+    return streams
+
+
+def quote_payload(quote, source, streams, query=""):
+    """
+    JSON shape of a quote on the watch page; `highlights` are [start, end] ranges in `text`.
+    `segmentStart` is where the HLS segment holding the quote starts, so the player loads that one first.
+    """
+    ep = quote.episode
+    video_url, package = streams.get(quote.episode_id) or streams.get(None) or ("", None)
+    return {
+        "id": quote.id,
+        "episodeId": quote.episode_id,
+        "text": quote.text,
+        "highlights": highlight_spans(quote.text, query) if query else [],
+        "episodeTitle": ep.title if ep else source.title,
+        "episodeKey": f"S{ep.season}E{ep.episode_number}" if ep else None,
+        "startTime": float(quote.start_time),
+        "endTime": float(quote.end_time),
+        "videoUrl": video_url,
+        "segmentStart": package.segment_start(quote.start_time) if package else None,
+        "thumbnailUrl": quote.thumbnail_url,
+        "thumbnailSrcset": quote.thumbnail_srcset,
+        "season": ep.season if ep else None,
+        "episode": ep.episode_number if ep else None,
+    }
+
+
+def quote_chunk(source, episode_id, after=None, limit=CHUNK_SIZE, start=None, end=None, streams=None):
+    """
+    One chunk of an episode's quotes (episode_id None for a movie) in playback order, as
+    {"episode", "results", "next"}; `after` is the (start_time, id) the previous chunk ended on.
+    """
+    if streams is None:
+        streams = video_streams(source)
+    quotes = source.quotes.filter(episode_id=episode_id).select_related("episode").order_by("start_time", "id")
+    if start is not None:
+        quotes = quotes.filter(start_time__gte=start)
+    if end is not None:
+        quotes = quotes.filter(start_time__lt=end)
+    if after is not None:
+        start_time, pk = after
+        quotes = quotes.filter(Q(start_time__gt=start_time) | Q(start_time=start_time, id__gt=pk))
+
+    chunk = list(quotes[: limit + 1])
+    has_next = len(chunk) > limit
+    chunk = chunk[:limit]
+    last = chunk[-1] if chunk else None
+    return {
+        "episode": episode_id,
+        "results": [quote_payload(quote, source, streams) for quote in chunk],
+        "next": encode_cursor([last.start_time, last.id], scope=f"{source.id}:{episode_id}") if has_next else None,
+    }
+
+
+def build_watch_payload(source):
+    """Everything watch_source needs from the database besides the Source row, serialized for the template."""
+    video_list = []
+    video_map = {}
+    streams = video_streams(source)
+
+    # 1. Episodes for the season/episode filters
+    episodes_data = [
+        {
+            "id": ep.id,
+            "key": f"S{ep.season}E{ep.episode_number}",
+            "season": ep.season,
+            "episode": ep.episode_number,
+            "title": ep.title,
+        }
+        for ep in source.episodes.order_by("season", "episode_number")
+    ]
+
+    # 2. Build video mapping; playlist URLs for packaged videos
+    if source.source_type == "tv_show":
+        for ep in episodes_data:
+            if ep["id"] in streams:
+                url = streams[ep["id"]][0]
+                video_map[ep["key"]] = url
+                video_list.append(url)
+    else:
+        if None in streams:
+            url = streams[None][0]
+            video_list = [url]
+            video_map["movie"] = url
+    default_url = video_list[0] if video_list else ""
+
+    # 3. The episode that plays first; its first chunk of quotes ships with the page, the rest is fetched lazily
+    current_episode = next((ep for ep in episodes_data if video_map.get(ep["key"]) == default_url), None)
+    if current_episode is None and episodes_data:
+        current_episode = episodes_data[0]
+    current_episode_id = current_episode["id"] if current_episode else None
+
+    return {
+        "video_url": default_url,
+        "video_map": script_json(video_map),
+        "episodes_json": script_json(episodes_data),
+        "current_episode_id": script_json(current_episode_id),
+        "quotes_json": script_json(quote_chunk(source, current_episode_id, streams=streams)),
+    }
+
+
+def content_version(source_id):
+    """The source's SourceStats.version, bumped by every change to its content (see `SourceStats.touch`)."""
+    return SourceStats.objects.filter(source_id=source_id).values_list("version", flat=True).first()
+
+
+def payload_key(source_id, version):
+    # The content version is part of the key, so a change made in any process (an import command,
+    # another worker) is picked up by all of them even when the cache is process-local.
+    # PAYLOAD_VERSION keeps payloads cached by older code from being read back.
+    return f"watch-payload:{PAYLOAD_VERSION}:{source_id}:{version}"
+
+
+def get_watch_payload(source):
+    """The payload of the source's current content version, built on the spot the first time it is needed."""
+    key = payload_key(source.id, content_version(source.id))
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_watch_payload(source)
+        cache.set(key, payload, PAYLOAD_TIMEOUT)
+    return payload
+
+
+def schedule_rebuild(source_id):
+    with _lock:
+        if source_id in _pending:
+            return
+        _pending.add(source_id)
+    executor.submit(rebuild_watch_payload, source_id)
+
+
+def rebuild_watch_payload(source_id):
+    with _lock:
+        _pending.discard(source_id)
+    try:
+        source = Source.objects.filter(id=source_id).first()
+        if source is not None:
+            cache.set(payload_key(source_id, content_version(source_id)), build_watch_payload(source), PAYLOAD_TIMEOUT)
+    except Exception:
+        logger.exception("Rebuilding the watch payload of source %s failed", source_id)
+    finally:
+        connection.close()
+
+
+def invalidate_watch_payload(source_id):
+    """
+    Build the payload of the source's new content version in the background once the current
+    transaction commits, so the next request finds it ready. Processes that don't share the
+    cache build it on their first request for that version instead.
+    """
+    transaction.on_commit(lambda: schedule_rebuild(source_id))
+
+
+def instance_changed(sender, instance, **kwargs):
+    """post_save/post_delete handler for Source, Episode and Quote."""
+    invalidate_watch_payload(instance.pk if sender is Source else instance.source_id)
+
+
+def content_changed(sender, source_ids, **kwargs):
+    """Handler for `clips.signals.content_changed`."""
+    for source_id in source_ids:
+        invalidate_watch_payload(source_id)
@@ -1,140 +1,313 @@
-import json
+import hashlib
+import os
 
-from django.db.models import Q
-from django.shortcuts import get_object_or_404, render
+from django.db.models import Count, Max, Q, prefetch_related_objects
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import DetailView, ListView
 
-from .models import Quote, Source
+from .models import CatalogStats, Episode, HlsPackage, Quote, Source, SourceRecommendation, SourceStats, SubtitleFile
+from .utils.autocomplete import MAX_SUGGESTIONS, suggest
+from .utils.conditional import catalog_versions, conditional_page, quote_versions, source_versions
+from .utils.pagination import CursorPage, decode_cursor, encode_cursor
+from .utils.search import SearchResults, search_quotes
+from .utils.streaming import serve_file
+from .utils.thumbnails import PLACEHOLDER_SVG, request_thumbnail
+from .utils.title_search import search_titles
+from .utils.view_counter import record_view
+from .utils.watch_payload import CHUNK_SIZE, get_watch_payload, quote_chunk, quote_payload, video_streams
+
+# Quotes per page of the watch page search endpoint
+SEARCH_PAGE_SIZE = 30
+MAX_SEARCH_PAGE_SIZE = 100
+# Counting stops here: "1000+ quotes" is as useful as the exact number and much cheaper
+SEARCH_COUNT_CAP = 1000
+# Largest chunk source_quotes hands out
+MAX_CHUNK_SIZE = 500
 
 
 class QuoteDetailView(DetailView):
     model = Quote
     template_name = "clips/quote_detail.html"
+    queryset = Quote.objects.select_related("source", "episode")
+
+    def dispatch(self, request, *args, **kwargs):
+        response = self.conditional_dispatch(request, *args, **kwargs)
+        # Counted once the quote is known to exist: a 304 comes from its source's versions (so the quote is
+        # there), a 200 from get_object(); ids that 404 are never buffered. Buffered and written in batches,
+        # never with save(), which would bump the source's content version on every view
+        if request.method == "GET" and response.status_code in (200, 304):
+            record_view(kwargs["pk"])
+        return response
+
+    # Shared caches revalidate every time too, so each view reaches dispatch and is counted
+    @method_decorator(conditional_page(quote_versions, shared_max_age=0))
+    def conditional_dispatch(self, request, *args, **kwargs):
+        return super().dispatch(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Increment view count
-        self.object.views += 1
-        self.object.save(update_fields=["views"])
+        # The pre-cut clip when there is one, so playing the quote doesn't load the whole video
+        context["playback"] = self.object.playback()
         return context
 
 
+def quote_thumbnail(request, pk):
+    """
+    Serve a quote thumbnail, generating it on first request.
+    While ffmpeg runs in the background a placeholder is returned (not cached),
+    so the next request picks up the stored image.
+    """
+    quote = get_object_or_404(Quote.objects.only("id", "thumbnail"), pk=pk)
+
+    if quote.thumbnail:
+        response = redirect(quote.thumbnail.url)
+        patch_cache_control(response, public=True, max_age=86400)
+        return response
+
+    request_thumbnail(quote.pk)
+    response = HttpResponse(PLACEHOLDER_SVG, content_type="image/svg+xml")
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
 class QuoteSearchView(ListView):
+    """
+    Pages with opaque `cursor` tokens (keyset, so page 500 costs what page 1 does) and a count capped
+    at SEARCH_COUNT_CAP. The old numbered `?page=` links still work, with an exact count and OFFSET.
+    """
+
     model = Quote
-    template_name = "clips/base.html"
+    template_name = "clips/quote_results.html"
     context_object_name = "quotes"
     paginate_by = 20
 
     def get_queryset(self):
-        query = self.request.GET.get("q", "")
+        query = self.request.GET.get("q", "").strip()
         if query:
-            return Quote.objects.filter(text__contains=query).select_related("source")
-        return Quote.objects.all().select_related("source")
+            # Ranked full-text search; snippets are built for the current page only
+            return search_quotes(query)
+        return Quote.objects.none()
+
+    def get_paginate_by(self, queryset):
+        return self.paginate_by if "page" in self.request.GET else None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get("q", "").strip()
+        context["query"] = query
+
+        if query and not context["is_paginated"]:
+            cursor_page = CursorPage(self.object_list, self.request.GET.get("cursor"), self.paginate_by, scope=query)
+            context["quotes"] = context["object_list"] = cursor_page.object_list
+            context["cursor_page"] = cursor_page
+            context["result_count"] = self.object_list.count_up_to(SEARCH_COUNT_CAP + 1)
+            context["result_count_capped"] = context["result_count"] > SEARCH_COUNT_CAP
+            context["result_count"] = min(context["result_count"], SEARCH_COUNT_CAP)
+        return context
 
 
+@conditional_page(catalog_versions)
 def home_view(request):
     """
-    Home page listing sources with live search by title or slug.
-    Shows up to 12 results, ordered alphabetically.
+    Home page listing sources with fuzzy search by title or slug.
+    Shows up to 12 results, alphabetical or by similarity when searching.
     Search query is preserved in the input field.
     """
     query = request.GET.get("q", "").strip()
 
-    # Base queryset
-    sources = Source.objects.all()
-
-    # Apply search filter if query exists
+    # Fuzzy title search ranked by trigram similarity, otherwise alphabetical
     if query:
-        sources = sources.filter(Q(title__icontains=query) | Q(slug__icontains=query))
-
-    # Order and limit
-    sources = sources.order_by("title")[:12]
+        sources = search_titles(query, limit=12)
+        prefetch_related_objects(sources, "stats")
+    else:
+        sources = Source.objects.select_related("stats").order_by("title")[:12]
 
+    # Counts come from the materialized stats, not from aggregating the catalog
+    catalog = CatalogStats.current()
     context = {
         "sources": sources,
         "query": query,
-        "total_sources": Source.objects.count(),
+        "catalog": catalog,
+        "total_sources": catalog.source_count,
     }
 
     return render(request, "clips/home.html", context)
 
 
+@conditional_page(source_versions)
 def watch_source(request, source_id):
     source = get_object_or_404(Source, id=source_id)
     query = request.GET.get("search", "")
 
-    video_list = []
-    video_map = {}
-
-    # 1. Build video mapping
-    if source.source_type == "tv_show":
-        episodes = source.episodes.exclude(video_file="").order_by("season", "episode_number")
-        for ep in episodes:
-            video_key = f"S{ep.season}E{ep.episode_number}"
-            url = ep.video_file.url
-            video_map[video_key] = url
-            video_list.append(url)
-    else:
-        if source.video_file:
-            url = source.video_file.url
-            video_list = [url]
-            video_map["movie"] = url
-
-    # 2. Get quotes with optimized DB query
-    if source.source_type == "tv_show":
-        quotes = (
-            Quote.objects.filter(episode__source=source)
-            .select_related("episode")
-            .order_by("episode__season", "episode__episode_number", "start_time")
-        )
-    else:
-        quotes = source.quotes.all().order_by("start_time")
-
-    quotes_data = []
-    default_url = video_list[0] if video_list else ""
-
-    for q in quotes:
-        ep = getattr(q, "episode", None)
-
-        if ep:
-            video_key = f"S{ep.season}E{ep.episode_number}"
-            current_video_url = video_map.get(video_key, default_url)
-        else:
-            current_video_url = default_url
-
-        # Get thumbnail URL - this is the key addition!
-        thumbnail_url = q.thumbnail.url if q.thumbnail else None
-
-        quotes_data.append(
-            {
-                "id": q.id,
-                "text": q.text,
-                "episodeTitle": ep.title if ep else source.title,
-                "startTime": float(q.start_time),
-                "endTime": float(q.end_time),
-                "videoUrl": current_video_url,
-                "thumbnailUrl": thumbnail_url,  # ← ADD THIS LINE
-                "season": ep.season if ep else None,
-                "episode": ep.episode_number if ep else None,
-            }
-        )
+    # Video map, episodes and the first chunk of quotes are cached per source and rebuilt when they change
+    payload = get_watch_payload(source)
 
-    recommendations = Source.objects.exclude(id=source_id).order_by("-id")[:5]
+    # Similar sources by quote text (`manage build_recommendations`), the newest ones until they are built
+    recommendations = [
+        rec.recommended
+        for rec in SourceRecommendation.objects.filter(source_id=source_id).select_related("recommended")
+    ]
+    if not recommendations:
+        recommendations = Source.objects.exclude(id=source_id).order_by("-id")[:5]
 
     return render(
         request,
         "clips/watch_source.html",
         {
             "source": source,
-            "video_url": default_url,
-            "video_map": json.dumps(video_map),
-            "quotes_json": json.dumps(quotes_data),
+            **payload,
             "query": query,
             "recommendations": recommendations,
         },
     )
 
 
+def source_quote_search(request, source_id):
+    """
+    Paged JSON search over one source's quotes, optionally narrowed to a season and/or an episode (by id).
+    Without `q` the quotes are listed in playback order, so the episode filters also work on their own.
+    Pages continue from the previous one's `next` cursor; `total` stops at SEARCH_COUNT_CAP (`totalCapped`).
+    """
+    source = get_object_or_404(Source, id=source_id)
+    query = request.GET.get("q", "").strip()
+    season = request.GET.get("season", "")
+    episode = request.GET.get("episode", "")
+
+    # 1. Narrow to episodes
+    episode_ids = None
+    if season.isdigit() or episode.isdigit():
+        episodes = source.episodes.all()
+        if season.isdigit():
+            episodes = episodes.filter(season=int(season))
+        if episode.isdigit():
+            episodes = episodes.filter(id=int(episode))
+        episode_ids = list(episodes.values_list("id", flat=True))
+
+    # 2. Ranked search, or playback order when there is no query
+    if query:
+        results = search_quotes(query, source_id=source.id, episode_ids=episode_ids)
+    else:
+        results = source.quotes.select_related("episode").order_by(
+            "episode__season", "episode__episode_number", "start_time"
+        )
+        if episode_ids is not None:
+            results = results.filter(episode_id__in=episode_ids)
+
+    # 3. One page at a time, without counting past the cap (every keystroke runs a search)
+    page_size = request.GET.get("page_size", "")
+    page_size = (
+        min(int(page_size), MAX_SEARCH_PAGE_SIZE) if page_size.isdigit() and int(page_size) else SEARCH_PAGE_SIZE
+    )
+    scope = f"{source.id}:{query}:{season}:{episode}"
+    quotes, next_cursor, total = quote_search_page(results, request.GET.get("cursor"), page_size, scope)
+    streams = video_streams(source)
+
+    return JsonResponse(
+        {
+            "query": query,
+            "total": min(total, SEARCH_COUNT_CAP),
+            "totalCapped": total > SEARCH_COUNT_CAP,
+            "hasNext": next_cursor is not None,
+            "next": next_cursor,
+            "results": [quote_payload(q, source, streams, query) for q in quotes],
+        }
+    )
+
+
+def quote_search_page(results, token, page_size, scope):
+    """
+    (quotes, next cursor, count up to SEARCH_COUNT_CAP + 1) for source_quote_search. Search results page by
+    keyset (CursorPage); the playback listing is a plain queryset and keeps its position in the cursor instead.
+    """
+    if isinstance(results, SearchResults):
+        page = CursorPage(results, token, page_size, scope=scope)
+        return page.object_list, page.next_cursor, results.count_up_to(SEARCH_COUNT_CAP + 1)
+
+    offset, _ = decode_cursor(token, scope)
+    offset = offset or 0
+    end = offset + page_size
+    quotes = list(results[offset:end])
+    has_next = results[end:].exists()
+    next_cursor = encode_cursor(end, scope=scope) if has_next else None
+    capped = results.order_by()[: SEARCH_COUNT_CAP + 1]
+    return quotes, next_cursor, capped.count()
+
+
+def quote_chunk_etag(request, source_id):
+    """
+    Changes whenever the source's quotes can have changed: any import touches its SubtitleFile
+    rows and any create/delete touches its stats. HLS packaging changes the video URLs in the
+    chunks. The query string is part of the tag.
+    """
+    imports = SubtitleFile.objects.filter(source_id=source_id).aggregate(latest=Max("imported_at"), files=Count("id"))
+    stats = SourceStats.objects.filter(source_id=source_id).values_list("updated_at", flat=True).first()
+    packaged = HlsPackage.objects.filter(Q(source_id=source_id) | Q(episode__source_id=source_id)).aggregate(
+        latest=Max("created_at"), count=Count("id")
+    )
+    version = (
+        f"{source_id}:{imports['latest']}:{imports['files']}:{stats}:"
+        f"{packaged['latest']}:{packaged['count']}:{request.GET.urlencode()}"
+    )
+    return hashlib.md5(version.encode()).hexdigest()
+
+
+@condition(etag_func=quote_chunk_etag)
+def source_quotes(request, source_id):
+    """
+    One episode's quotes (or a movie's) in playback order, a chunk at a time, for lazy loading.
+    `episode` is an episode id (omit it for movies), `start`/`end` limit the chunk to a time window in seconds
+    and `cursor` continues after the previous chunk (keyset on start_time, id).
+    """
+    source = get_object_or_404(Source, id=source_id)
+    episode = request.GET.get("episode", "")
+    episode_id = int(episode) if episode.isdigit() else None
+
+    try:
+        start = float(request.GET["start"]) if request.GET.get("start") else None
+        end = float(request.GET["end"]) if request.GET.get("end") else None
+    except ValueError:
+        return JsonResponse({"error": "start and end must be numbers of seconds"}, status=400)
+
+    after, _ = decode_cursor(request.GET.get("cursor"), f"{source.id}:{episode_id}")
+    limit = request.GET.get("limit", "")
+    limit = min(int(limit), MAX_CHUNK_SIZE) if limit.isdigit() and int(limit) else CHUNK_SIZE
+
+    response = JsonResponse(quote_chunk(source, episode_id, after, limit, start, end))
+    # Always revalidate; an unchanged chunk costs a 304 and the three ETag queries
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def stream_video(request, kind, pk):
+    """A Source's or Episode's video with byte-range support, so the player can seek without downloading."""
+    model = Episode if kind == "episode" else Source
+    obj = get_object_or_404(model.objects.only("video_file"), pk=pk)
+    if not obj.video_file or not os.path.exists(obj.video_file.path):
+        raise Http404("No video file")
+    return serve_file(request, obj.video_file.path)
+
+
+def autocomplete(request):
+    """
+    Completions for the prefix in `q`: source titles first, then frequent quote phrases.
+    `kind=title` or `kind=phrase` limits the suggestions to one of them.
+    """
+    prefix = request.GET.get("q", "")
+    limit = request.GET.get("limit", "")
+    limit = min(int(limit), MAX_SUGGESTIONS) if limit.isdigit() else 8
+    kind = request.GET.get("kind", "")
+    kinds = (kind,) if kind in ("title", "phrase") else ("title", "phrase")
+
+    response = JsonResponse({"query": prefix, "suggestions": suggest(prefix, limit, kinds)})
+    # Suggestions only change on import; a short browser cache absorbs repeated keystrokes
+    patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
 def ui_test(request):
     """Quick UI preview without data"""
     return render(
@@ -142,7 +315,9 @@ def ui_test(request):
         "clips/watch_source.html",
         {
             "source": Source(title="UI Test Video"),
-            "quotes_json": "[]",
+            "episodes_json": "[]",
+            "current_episode_id": "null",
+            "quotes_json": "null",
             "query": "",
             "recommendations": Source.objects.all()[:3],
         },
@@ -1 +1,39 @@
 IN_DOCKER = True
+
+# Memory-mapped quote search index built by `manage build_quote_index`.
+# Leave as None to search quotes in the database instead.
+QUOTE_INDEX_PATH = None
+
+# How clips' streaming view sends video files. None sends them from Django (zero-copy where the
+# WSGI server's file wrapper uses sendfile, e.g. gunicorn); "X-Accel-Redirect" (nginx) or
+# "X-Sendfile" (Apache, lighttpd) hands them to the web server instead.
+VIDEO_SENDFILE_HEADER = None
+# Internal nginx location aliased to MEDIA_ROOT, used with X-Accel-Redirect
+VIDEO_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+
+# HLS renditions made by `manage package_hls`: (name, height, video kbit/s). Renditions taller than
+# the source video are skipped. Segments are HLS_SEGMENT_SECONDS long and cut at the same times in
+# every rendition, so a timestamp maps to the same segment number whichever rendition is playing.
+HLS_RENDITIONS = [("360p", 360, 800), ("720p", 720, 2800), ("1080p", 1080, 5000)]
+HLS_SEGMENT_SECONDS = 4
+
+# Seconds a CDN or reverse proxy may serve the catalog pages (home, watch) without revalidating.
+# Browsers always revalidate, which costs a 304 while the content version is unchanged.
+CATALOG_CACHE_SECONDS = 60
+
+# Quote views are buffered per process and written every VIEW_FLUSH_INTERVAL seconds,
+# or as soon as VIEW_BUFFER_SIZE different quotes are waiting.
+VIEW_FLUSH_INTERVAL = 10
+VIEW_BUFFER_SIZE = 1000
+
+# Shared by every process on the host, so web workers and management commands (process_subs,
+# build_quote_index, ...) reuse each other's watch payloads. Correctness doesn't
+# depend on it: cached data is keyed by content versions stored in the database. Use Redis or
+# Memcached instead when the site runs on more than one host.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": "/tmp/quotable-cache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
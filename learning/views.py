@@ -138,7 +138,8 @@ def favorite_list(request):
                 "season": ep.season if ep else None,
                 "episode": ep.episode_number if ep else None,
                 "start_time": float(q.start_time),
-                "thumbnail": q.thumbnail.url if q.thumbnail else None,
+                "thumbnail": q.thumbnail_url,
+                "thumbnail_srcset": q.thumbnail_srcset,
                 "emotion_tag": fav.emotion_tag,
                 "personal_note": fav.personal_note,
                 "mastery_status": mastery.status if mastery else "saved",
@@ -379,7 +380,8 @@ def word_note_list(request):
                     "source": q.source.title,
                     "season": ep.season if ep else None,
                     "episode": ep.episode_number if ep else None,
-                    "thumbnail": q.thumbnail.url if q.thumbnail else None,
+                    "thumbnail": q.thumbnail_url,
+                    "thumbnail_srcset": q.thumbnail_srcset,
                     "start_time": float(q.start_time),
                 },
                 "created_at": note.created_at.isoformat(),
@@ -478,7 +480,11 @@ def review_queue(request):
                     if ep and ep.video_file
                     else (q.source.video_file.url if q.source.video_file else None)
                 ),
-                "thumbnail": q.thumbnail.url if q.thumbnail else None,
+                "thumbnail": q.thumbnail_url,
+                "thumbnail_srcset": q.thumbnail_srcset,
+                # A few hundred KB instead of the whole episode; the quote starts `clip_offset` seconds in
+                "clip_url": q.clip_url,
+                "clip_offset": q.clip_offset,
                 "status": mastery.status,
                 "review_count": mastery.review_count,
                 "overdue_days": (now - mastery.next_review).days,